@@ -5,7 +5,7 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.database import Base
 from app.core.config import settings
-from app.models.database_models import Agent, Tool  # Import models for autogenerate
+from app.models.database_models import Agent, Tool, OCRJob, Conversation, Message  # Import models for autogenerate
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,98 @@
+"""Add agent Ollama options, OCR jobs and conversations
+
+Revision ID: 3f2a9c1d7b40
+Revises: 9c4e2b7a1f03
+Create Date: 2026-10-16 10:00:00.000000
+
+Databases created before migrations existed may already have some of
+these tables and columns (create_all, or the old startup ALTER). Upgrade
+adds only what is missing, and from then on this revision owns all of
+them: downgrade drops them either way.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b40'
+down_revision: Union[str, None] = '9c4e2b7a1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> set:
+    """Names of the table's existing columns."""
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    agent_columns = _columns('agents')
+    if 'keep_alive' not in agent_columns:
+        op.add_column('agents', sa.Column('keep_alive', sa.String(length=20), nullable=True))
+    if 'num_ctx' not in agent_columns:
+        op.add_column('agents', sa.Column('num_ctx', sa.Integer(), nullable=True))
+
+    if not inspector.has_table('ocr_jobs'):
+        op.create_table(
+            'ocr_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=False),
+            sa.Column('backend', sa.String(length=20), server_default='databricks', nullable=False),
+            sa.Column('volume_path', sa.String(length=1024), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('run_id', sa.String(length=64), nullable=True),
+            sa.Column('state_message', sa.Text(), nullable=True),
+            sa.Column('result', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_ocr_jobs_id'), 'ocr_jobs', ['id'], unique=False)
+        op.create_index(op.f('ix_ocr_jobs_run_id'), 'ocr_jobs', ['run_id'], unique=False)
+        op.create_index(op.f('ix_ocr_jobs_status'), 'ocr_jobs', ['status'], unique=False)
+    elif 'backend' not in _columns('ocr_jobs'):
+        # Jobs recorded before local OCR existed all ran on Databricks
+        op.add_column(
+            'ocr_jobs',
+            sa.Column('backend', sa.String(length=20), server_default='databricks', nullable=False)
+        )
+
+    if not inspector.has_table('conversations'):
+        op.create_table(
+            'conversations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('agent_id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=255), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_conversations_agent_id'), 'conversations', ['agent_id'], unique=False)
+        op.create_index(op.f('ix_conversations_id'), 'conversations', ['id'], unique=False)
+    if not inspector.has_table('messages'):
+        op.create_table(
+            'messages',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('conversation_id', sa.Integer(), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_messages_conversation_id'), 'messages', ['conversation_id'], unique=False)
+        op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('messages')
+    op.drop_table('conversations')
+    op.drop_table('ocr_jobs')
+    with op.batch_alter_table('agents') as batch_op:
+        batch_op.drop_column('num_ctx')
+        batch_op.drop_column('keep_alive')
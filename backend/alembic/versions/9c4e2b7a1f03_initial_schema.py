@@ -0,0 +1,63 @@
+"""Initial schema: agents and tools
+
+Revision ID: 9c4e2b7a1f03
+Revises: 
+Create Date: 2026-10-16 09:00:00.000000
+
+Databases created before migrations existed (by create_all at startup)
+already have these tables. Upgrade adopts them as they are, and from then
+on this revision owns them: downgrade drops them either way.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2b7a1f03'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('agents'):
+        op.create_table(
+            'agents',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('system_prompt', sa.Text(), nullable=False),
+            sa.Column('model', sa.String(length=50), nullable=True),
+            sa.Column('temperature', sa.String(length=10), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_agents_id'), 'agents', ['id'], unique=False)
+        op.create_index(op.f('ix_agents_name'), 'agents', ['name'], unique=True)
+    if not inspector.has_table('tools'):
+        op.create_table(
+            'tools',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('tool_type', sa.String(length=50), nullable=False),
+            sa.Column('implementation', sa.Text(), nullable=True),
+            sa.Column('parameters', sa.JSON(), nullable=True),
+            sa.Column('agent_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_tools_id'), 'tools', ['id'], unique=False)
+        op.create_index(op.f('ix_tools_name'), 'tools', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('tools')
+    op.drop_table('agents')
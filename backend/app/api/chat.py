@@ -1,12 +1,17 @@
 """API endpoints for chat functionality."""
-from fastapi import APIRouter, Depends, HTTPException, status
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import AsyncIterator
-from app.core.database import get_db
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.schemas.pydantic_models import ChatRequest, ChatResponse, ChatMessage
-from app.services.agent_service import AgentService
+from app.services.agent_service import AsyncAgentService
+from app.services.conversation_service import ConversationService
+from app.services.generation_registry import DuplicateRequestError, generation_registry
 from app.services.langgraph_executor import LangGraphExecutor
+from app.services.llm_scheduler import AdmissionError, fairness_key, llm_scheduler
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -25,11 +30,51 @@ def _convert_messages(messages: list[ChatMessage]) -> list:
     return langchain_messages
 
 
+async def _check_conversation(db: AsyncSession, chat_request: ChatRequest) -> None:
+    """Ensure the requested conversation exists and belongs to the agent."""
+    if chat_request.conversation_id is None:
+        return
+    conversation = await ConversationService.get_conversation(db, chat_request.conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation with ID {chat_request.conversation_id} not found"
+        )
+    if conversation.agent_id != chat_request.agent_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Conversation {conversation.id} belongs to a different agent"
+        )
+
+
+def _client_id(request: Request, chat_request: ChatRequest) -> str:
+    """Fairness key for admission: X-Session-ID, else the conversation, else the address."""
+    return fairness_key(
+        request.headers.get("x-session-id"),
+        chat_request.conversation_id,
+        request.client.host if request.client else None
+    )
+
+
+def _admission_exception(error: AdmissionError) -> HTTPException:
+    """HTTP error for a request the scheduler turned away."""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def _sse_event(data: str) -> str:
+    """Format a chunk as a server-sent event, one data line per text line."""
+    return "".join(f"data: {line}\n" for line in data.split("\n")) + "\n"
+
+
 @router.post("/", response_model=ChatResponse)
-async def chat(chat_request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(chat_request: ChatRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Chat with an agent."""
     # Get agent
-    agent = AgentService.get_agent(db, chat_request.agent_id)
+    agent = await AsyncAgentService.get_agent_config(db, chat_request.agent_id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -42,22 +87,42 @@ async def chat(chat_request: ChatRequest, db: Session = Depends(get_db)):
             detail=f"Agent '{agent.name}' is not active"
         )
     
+    await _check_conversation(db, chat_request)
+    
     # Convert messages
     messages = _convert_messages(chat_request.messages)
     
     # Execute agent
     executor = LangGraphExecutor(db)
-    response_text = await executor.execute_async(agent, messages)
+    try:
+        response_text = await executor.execute_async(
+            agent,
+            messages,
+            conversation_id=chat_request.conversation_id,
+            request_id=chat_request.request_id,
+            client_id=_client_id(request, chat_request)
+        )
+    except AdmissionError as e:
+        raise _admission_exception(e)
+    except DuplicateRequestError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     
-    return ChatResponse(response=response_text, agent_id=agent.id)
+    return ChatResponse(
+        response=response_text,
+        agent_id=agent.id,
+        conversation_id=chat_request.conversation_id,
+        request_id=executor.request_id,
+        cancelled=executor.cancelled,
+        cached=executor.cache_hit
+    )
 
 
 @router.post("/stream")
-async def chat_stream(chat_request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_stream(chat_request: ChatRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Chat with an agent (streaming response)."""
     try:
         # Get agent
-        agent = AgentService.get_agent(db, chat_request.agent_id)
+        agent = await AsyncAgentService.get_agent_config(db, chat_request.agent_id)
         if not agent:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -70,18 +135,42 @@ async def chat_stream(chat_request: ChatRequest, db: Session = Depends(get_db)):
                 detail=f"Agent '{agent.name}' is not active"
             )
         
+        await _check_conversation(db, chat_request)
+        
         # Convert messages
         messages = _convert_messages(chat_request.messages)
+        conversation_id = chat_request.conversation_id
+        request_id = chat_request.request_id or uuid.uuid4().hex
+        if generation_registry.is_live(request_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A chat request with ID {request_id} is already running"
+            )
         
-        # Execute agent with streaming
-        executor = LangGraphExecutor(db)
+        # Admit before the response starts, so overload is still an HTTP error
+        try:
+            admission = await llm_scheduler.admit(agent.model, _client_id(request, chat_request))
+        except AdmissionError as e:
+            raise _admission_exception(e)
         
         async def generate() -> AsyncIterator[str]:
+            # A client disconnect cancels this generator, and with it the run
             try:
-                async for chunk in executor.execute(agent, messages, stream=True):
-                    if chunk:  # Only yield non-empty chunks
-                        yield f"data: {chunk}\n\n"
-                yield "data: [DONE]\n\n"
+                # The request-scoped session is closed once the route returns,
+                # so the stream runs against its own session.
+                async with AsyncSessionLocal() as stream_db:
+                    executor = LangGraphExecutor(stream_db)
+                    async for chunk in executor.execute(
+                        agent,
+                        messages,
+                        stream=True,
+                        conversation_id=conversation_id,
+                        request_id=request_id,
+                        admission=admission
+                    ):
+                        if chunk:  # Only yield non-empty chunks
+                            yield _sse_event(chunk)
+                yield "data: [CANCELLED]\n\n" if executor.cancelled else "data: [DONE]\n\n"
             except Exception as e:
                 error_msg = f"Error: {str(e)}"
                 yield f"data: {error_msg}\n\n"
@@ -94,7 +183,10 @@ async def chat_stream(chat_request: ChatRequest, db: Session = Depends(get_db)):
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
                 "Access-Control-Allow-Origin": "*",
-            }
+                "X-Request-ID": request_id,
+            },
+            # Frees the slot even if the client left before the stream started
+            background=BackgroundTask(admission.release)
         )
     except HTTPException:
         raise
@@ -104,3 +196,14 @@ async def chat_stream(chat_request: ChatRequest, db: Session = Depends(get_db)):
             detail=f"Internal server error: {str(e)}"
         )
 
+
+
+@router.post("/cancel/{request_id}")
+async def cancel_chat(request_id: str):
+    """Cancel a running chat request, stopping its Ollama generation."""
+    if not generation_registry.cancel(request_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No running chat request with ID {request_id}"
+        )
+    return {"request_id": request_id, "cancelled": True}
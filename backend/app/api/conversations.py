@@ -0,0 +1,67 @@
+"""API endpoints for server-side conversations."""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.database import get_async_db
+from app.schemas.pydantic_models import ConversationCreate, ConversationResponse, ConversationWithMessages
+from app.services.agent_service import AsyncAgentService
+from app.services.conversation_service import ConversationService
+
+router = APIRouter(prefix="/conversations", tags=["conversations"])
+
+
+@router.post("/", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
+async def create_conversation(conversation: ConversationCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a conversation, optionally seeded with earlier messages."""
+    agent = await AsyncAgentService.get_agent_config(db, conversation.agent_id)
+    if not agent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Agent with ID {conversation.agent_id} not found"
+        )
+
+    title = conversation.title
+    if title is None:
+        first_user_message = next((m.content for m in conversation.messages if m.role == "user"), None)
+        title = first_user_message[:100] if first_user_message else None
+
+    return await ConversationService.create_conversation(
+        db,
+        conversation.agent_id,
+        title=title,
+        messages=[(m.role, m.content) for m in conversation.messages]
+    )
+
+
+@router.get("/", response_model=List[ConversationResponse])
+async def get_conversations(
+    agent_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get conversations, optionally for one agent."""
+    return await ConversationService.get_conversations(db, agent_id=agent_id, skip=skip, limit=limit)
+
+
+@router.get("/{conversation_id}", response_model=ConversationWithMessages)
+async def get_conversation(conversation_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a conversation with its messages."""
+    conversation = await ConversationService.get_conversation_with_messages(db, conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation with ID {conversation_id} not found"
+        )
+    return conversation
+
+
+@router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(conversation_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a conversation and its messages."""
+    success = await ConversationService.delete_conversation(db, conversation_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation with ID {conversation_id} not found"
+        )
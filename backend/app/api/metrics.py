@@ -0,0 +1,41 @@
+"""API endpoints for runtime performance metrics."""
+from fastapi import APIRouter
+from app.services.config_cache import agent_config_cache
+from app.services.context_manager import context_manager
+from app.services.generation_registry import generation_registry
+from app.services.graph_cache import graph_cache
+from app.services.llm_registry import get_llm_registry
+from app.services.llm_scheduler import llm_scheduler
+from app.services.model_catalog import model_catalog
+from app.services.model_residency import model_residency
+from app.services.response_cache import response_cache
+from app.services.ocr_job_service import ocr_job_manager
+from app.services.tool_result_cache import tool_result_cache
+from app.services.metrics import first_token_latency, ollama_timings, stream_total_latency
+from app.tools.builtin.extraction_cache import extraction_cache_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+async def get_metrics():
+    """Get cache, client pool and streaming latency metrics."""
+    return {
+        "graph_cache": graph_cache.stats(),
+        "config_cache": agent_config_cache.stats(),
+        "llm_clients": get_llm_registry().stats(),
+        "pdf_extraction_cache": extraction_cache_stats(),
+        "ocr_jobs": ocr_job_manager.stats(),
+        "tool_results": tool_result_cache.stats(),
+        "context": context_manager.stats(),
+        "generations": generation_registry.stats(),
+        "scheduler": llm_scheduler.stats(),
+        "response_cache": response_cache.stats(),
+        "ollama": ollama_timings.snapshot(),
+        "model_residency": model_residency.stats(),
+        "model_catalog": model_catalog.stats(),
+        "streaming": {
+            "first_token": first_token_latency.snapshot(),
+            "total": stream_total_latency.snapshot(),
+        },
+    }
@@ -1,71 +1,78 @@
 """API endpoints for model management."""
-from fastapi import APIRouter, HTTPException
-from app.core.config import settings
-import httpx
+from typing import Any, Callable, Dict, List
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from app.services.model_catalog import model_catalog
 
 router = APIRouter(prefix="/models", tags=["models"])
 
+# Curated external models listed next to the local ones
+EXTERNAL_MODELS = [
+    {"id": "claude-sonnet-3.5", "name": "Claude Sonnet 3.5", "provider": "Anthropic"},
+    {"id": "gpt-4", "name": "GPT-4", "provider": "OpenAI"},
+]
 
-@router.get("/ollama")
-async def get_ollama_models():
-    """Get available Ollama models."""
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this version."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _catalog_response(
+    request: Request,
+    view: str,
+    build: Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+) -> Response:
+    """Build a response from the cached model list, or 304 if the client has it."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=10.0)
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail="Failed to fetch models from Ollama")
-            
-            data = response.json()
-            models = [model.get("name", "").split(":")[0] for model in data.get("models", [])]
-            return {"models": list(set(models))}  # Remove duplicates
+        models, version = await model_catalog.get()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching models: {str(e)}")
 
+    # The body depends only on the catalog version and the view
+    etag = f'"{view}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(models), headers=headers)
 
-@router.get("/available")
-async def get_available_models():
-    """Return all locally available models (from Ollama)."""
-    import httpx
-    from fastapi import HTTPException
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=10.0)
-
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch Ollama models")
-
-            data = response.json()
-            ollama_models = [
-                {
-                    "id": model.get("name", "").strip(),
-                    "name": model.get("name", "").title(),
-                    "provider": "Ollama"
-                }
-                for model in data.get("models", [])
-            ]
-
-            # Add curated external ones
-            external_models = [
-                {"id": "claude-sonnet-3.5", "name": "Claude Sonnet 3.5", "provider": "Anthropic"},
-                {"id": "gpt-4", "name": "GPT-4", "provider": "OpenAI"},
-            ]
-
-            # Combine Ollama + External
-            all_models = ollama_models + external_models
-
-            # Deduplicate by ID
-            seen = set()
-            unique_models = []
-            for m in all_models:
-                if m["id"] not in seen:
-                    seen.add(m["id"])
-                    unique_models.append(m)
-
-            return {"models": unique_models}
+def _ollama_names(models: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Distinct model names without tags."""
+    return {"models": sorted({model.get("name", "").split(":")[0] for model in models})}
+
+
+def _available_models(models: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Local models followed by the curated external ones, deduplicated by id."""
+    ollama_models = [
+        {
+            "id": model.get("name", "").strip(),
+            "name": model.get("name", "").title(),
+            "provider": "Ollama"
+        }
+        for model in models
+    ]
+
+    seen = set()
+    unique_models = []
+    for m in ollama_models + EXTERNAL_MODELS:
+        if m["id"] not in seen:
+            seen.add(m["id"])
+            unique_models.append(m)
+    return {"models": unique_models}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching models: {str(e)}")
 
+@router.get("/ollama")
+async def get_ollama_models(request: Request):
+    """Get available Ollama models."""
+    return await _catalog_response(request, "ollama", _ollama_names)
 
 
+@router.get("/available")
+async def get_available_models(request: Request):
+    """Return all locally available models (from Ollama)."""
+    return await _catalog_response(request, "available", _available_models)
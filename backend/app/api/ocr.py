@@ -1,22 +1,35 @@
-"""API endpoints for OCR functionality with Databricks integration."""
-from fastapi import APIRouter, File, UploadFile, HTTPException, status
-import requests
-import os
-from app.core.config import settings
+"""API endpoints for OCR functionality with local and Databricks backends."""
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.database import get_async_db
+from app.schemas.pydantic_models import OCRJobResponse
+from app.services.databricks_service import DatabricksError
+from app.services.ocr_backends import OCRBackendUnavailableError, choose_ocr_backend, inspect_upload
+from app.services.ocr_job_service import OCRJobService
 
 router = APIRouter(prefix="/ocr", tags=["ocr"])
 
 
 @router.post("/")
-async def perform_ocr(file: UploadFile = File(...)):
+async def perform_ocr(
+    file: UploadFile = File(...),
+    backend: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Upload a PDF file and trigger OCR processing in Databricks.
+    Upload a PDF file and run OCR on it.
+    
+    Small documents (by OCR_LOCAL_MAX_PAGES / OCR_LOCAL_MAX_BYTES) are
+    processed locally and returned in the response. Larger ones are uploaded
+    to Databricks and queued; poll /ocr/jobs/{job_id} for progress.
     
     Args:
         file: The PDF file to upload
+        backend: Force "local" or "databricks" instead of OCR_BACKEND routing
         
     Returns:
-        Status and Databricks run information
+        Job information, plus the result (local) or the Databricks run if submitted
     """
     # Validate file type
     if not file.filename.lower().endswith('.pdf'):
@@ -25,89 +38,88 @@ async def perform_ocr(file: UploadFile = File(...)):
             detail="Only PDF files are supported"
         )
     
-    # Validate Databricks configuration
-    if not settings.DATABRICKS_URL or not settings.DATABRICKS_TOKEN:
+    document = await inspect_upload(file)
+    try:
+        ocr_backend = choose_ocr_backend(document, backend)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Databricks configuration is missing. Please check your environment variables."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    
-    if not settings.DATABRICKS_NOTEBOOK_PATH or not settings.DATABRICKS_VOLUME_PATH:
+    except OCRBackendUnavailableError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Databricks notebook or volume path is missing. Please check your environment variables."
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
         )
     
     try:
-        # Step 1: Save uploaded file locally
-        local_path = f"/tmp/{file.filename}"
-        os.makedirs("/tmp", exist_ok=True)
-        
-        with open(local_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Step 2: Upload file to Databricks Volume
-        upload_endpoint = f"{settings.DATABRICKS_URL}/api/2.0/fs/files{settings.DATABRICKS_VOLUME_PATH}/{file.filename}"
-        headers = {"Authorization": f"Bearer {settings.DATABRICKS_TOKEN}"}
-        
-        with open(local_path, "rb") as f:
-            resp = requests.put(upload_endpoint, headers=headers, data=f, timeout=60)
-        
-        if resp.status_code != 200:
-            # Clean up local file
-            if os.path.exists(local_path):
-                os.remove(local_path)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload to Databricks Volume: {resp.text}"
-            )
-        
-        # Step 3: Trigger Databricks Notebook job
-        run_endpoint = f"{settings.DATABRICKS_URL}/api/2.1/jobs/runs/submit"
-        payload = {
-            "run_name": f"OCR_{file.filename}",
-            "tasks": [{
-                "task_key": "ocr_task",
-                "notebook_task": {
-                    "notebook_path": settings.DATABRICKS_NOTEBOOK_PATH,
-                    "base_parameters": {"pdf_path": f"{settings.DATABRICKS_VOLUME_PATH}/{file.filename}"}
-                }
-            }]
-        }
-        
-        r = requests.post(run_endpoint, headers=headers, json=payload, timeout=60)
-        
-        # Clean up local file
-        if os.path.exists(local_path):
-            os.remove(local_path)
-        
-        if r.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to trigger Databricks job: {r.text}"
-            )
-        
-        return {
-            "status": "success",
-            "message": f"PDF '{file.filename}' uploaded and OCR job triggered successfully",
-            "filename": file.filename,
-            "databricks_run": r.json()
-        }
-        
-    except HTTPException:
-        raise
+        job = await ocr_backend.submit(db, document)
+    except DatabricksError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
     except Exception as e:
-        # Clean up local file on error
-        local_path = f"/tmp/{file.filename}"
-        if os.path.exists(local_path):
-            try:
-                os.remove(local_path)
-            except:
-                pass
-        
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing PDF: {str(e)}"
         )
+    
+    if job.status == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing PDF: {job.state_message}"
+        )
+    
+    response = {
+        "status": "success",
+        "message": f"PDF '{document.filename}' OCR job {job.status} ({job.backend})",
+        "filename": document.filename,
+        "job_id": job.id,
+        "job_status": job.status,
+        "backend": job.backend,
+        "databricks_run": {"run_id": job.run_id} if job.run_id else None
+    }
+    if job.status == "succeeded":
+        response["result"] = job.result
+    return response
+
+
+@router.get("/jobs", response_model=List[OCRJobResponse])
+async def list_ocr_jobs(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """List OCR jobs, newest first."""
+    return await OCRJobService.get_jobs(db, skip=skip, limit=limit)
 
+
+@router.get("/jobs/{job_id}", response_model=OCRJobResponse)
+async def get_ocr_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the state of an OCR job."""
+    job = await OCRJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"OCR job with id {job_id} not found"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_ocr_job_result(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the cached output of a finished OCR job."""
+    job = await OCRJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"OCR job with id {job_id} not found"
+        )
+    if job.status == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"OCR job failed: {job.state_message}"
+        )
+    if job.status != "succeeded":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"OCR job is still {job.status}"
+        )
+    return {"job_id": job.id, "filename": job.filename, "result": job.result}
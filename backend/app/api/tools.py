@@ -1,50 +1,75 @@
 """API endpoints for tool management."""
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List
+from app.core.database import get_async_db
 from app.schemas.pydantic_models import ToolCreate, ToolUpdate, ToolResponse
-from app.services.tool_service import ToolService
+from app.services.tool_service import AsyncToolService
+from app.tools.builtin.registry import create_builtin_tool_instance
 
 router = APIRouter(prefix="/tools", tags=["tools"])
 
 
 @router.post("/", response_model=ToolResponse, status_code=status.HTTP_201_CREATED)
-async def create_tool(tool: ToolCreate, db: Session = Depends(get_db)):
+async def create_tool(tool: ToolCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new tool."""
     # Check if tool with same name exists
-    existing = ToolService.get_tool_by_name(db, tool.name)
+    existing = await AsyncToolService.get_tool_by_name(db, tool.name)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Tool with name '{tool.name}' already exists"
         )
     
-    return ToolService.create_tool(db, tool)
+    return await AsyncToolService.create_tool(db, tool)
 
 
 @router.get("/", response_model=List[ToolResponse])
-async def get_tools(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_tools(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
     """Get all tools."""
-    return ToolService.get_all_tools(db, skip=skip, limit=limit)
+    return await AsyncToolService.get_all_tools(db, skip=skip, limit=limit)
 
 
 @router.get("/builtin", response_model=List[ToolResponse])
-async def get_builtin_tools(db: Session = Depends(get_db)):
+async def get_builtin_tools(db: AsyncSession = Depends(get_async_db)):
     """Get all builtin tools."""
-    return ToolService.get_builtin_tools(db)
+    return await AsyncToolService.get_builtin_tools(db)
+
+
+@router.post("/builtin/pdf_to_json/stream")
+async def stream_pdf_to_json(file: UploadFile = File(...), include_timings: bool = False):
+    """Run the PDF to JSON tool on an upload, streaming one NDJSON line per page."""
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only PDF files are supported"
+        )
+    
+    file_bytes = await file.read()
+    tool = create_builtin_tool_instance("pdf_to_json")
+    
+    async def generate() -> AsyncIterator[str]:
+        try:
+            async for page_record in tool.aiter_pages(file_bytes, include_timings=include_timings):
+                yield json.dumps(page_record, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Error processing PDF: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
 @router.get("/agent/{agent_id}", response_model=List[ToolResponse])
-async def get_tools_by_agent(agent_id: int, db: Session = Depends(get_db)):
+async def get_tools_by_agent(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all tools for a specific agent."""
-    return ToolService.get_tools_by_agent(db, agent_id)
+    return await AsyncToolService.get_tools_by_agent(db, agent_id)
 
 
 @router.get("/{tool_id}", response_model=ToolResponse)
-async def get_tool(tool_id: int, db: Session = Depends(get_db)):
+async def get_tool(tool_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get tool by ID."""
-    tool = ToolService.get_tool(db, tool_id)
+    tool = await AsyncToolService.get_tool(db, tool_id)
     if not tool:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,10 +82,10 @@ async def get_tool(tool_id: int, db: Session = Depends(get_db)):
 async def update_tool(
     tool_id: int,
     tool_update: ToolUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a tool."""
-    tool = ToolService.update_tool(db, tool_id, tool_update)
+    tool = await AsyncToolService.update_tool(db, tool_id, tool_update)
     if not tool:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,9 +95,9 @@ async def update_tool(
 
 
 @router.delete("/{tool_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_tool(tool_id: int, db: Session = Depends(get_db)):
+async def delete_tool(tool_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a tool."""
-    success = ToolService.delete_tool(db, tool_id)
+    success = await AsyncToolService.delete_tool(db, tool_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,9 +1,30 @@
-"""WebSocket endpoints for real-time chat."""
+"""WebSocket endpoints for real-time chat.
+
+One connection carries many turns. Client messages:
+
+- ``{"type": "chat", "request_id", "agent_id", "messages", "conversation_id"?, "stream"?}``
+- ``{"type": "cancel", "request_id"}``
+- ``{"type": "ping"}`` / ``{"type": "pong"}``
+
+A message without ``type`` is treated as a chat request, so single-shot
+clients keep working. Replies (``chunk``, ``done``, ``error``,
+``cancelled``) carry the ``request_id`` they belong to; several turns may be
+in flight at once. The server sends ``ping`` every WS_HEARTBEAT_INTERVAL and
+closes connections it has not heard from within WS_HEARTBEAT_TIMEOUT.
+"""
+import asyncio
 import json
-from fastapi import WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.agent_service import AgentService
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.agent_service import AsyncAgentService
+from app.services.config_cache import AgentSnapshot
+from app.services.conversation_service import ConversationService
+from app.services.generation_registry import generation_registry
+from app.services.llm_scheduler import AdmissionError, fairness_key
 from app.services.langgraph_executor import LangGraphExecutor
 from app.schemas.pydantic_models import ChatMessage
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
@@ -22,103 +43,227 @@ def _convert_messages(messages: list[ChatMessage]) -> list:
     return langchain_messages
 
 
-async def websocket_endpoint(websocket: WebSocket, db: Session):
-    """WebSocket endpoint for real-time chat streaming."""
-    await websocket.accept()
-    
-    try:
-        # Wait for initial message with agent_id and messages
-        data = await websocket.receive_text()
-        request = json.loads(data)
-        
-        agent_id = request.get("agent_id")
-        messages_data = request.get("messages", [])
-        stream = request.get("stream", True)
-        
-        if not agent_id:
-            await websocket.send_json({
+class RequestError(Exception):
+    """A chat request that cannot be served; reported to the client as an error."""
+
+
+class ChatConnection:
+    """State of one WebSocket connection: in-flight turns, agents and executors."""
+
+    def __init__(self, websocket: WebSocket):
+        """Initialize connection state."""
+        self.websocket = websocket
+        # Fairness for model admission: the session_id query parameter, else
+        # each turn's conversation, else the client's address
+        self.session_id = websocket.query_params.get("session_id")
+        self.address = websocket.client.host if websocket.client else None
+        self._send_lock = asyncio.Lock()
+        self._turns: Dict[str, asyncio.Task] = {}
+        # Client request id -> generation registry id of the turn's run
+        self._generation_ids: Dict[str, str] = {}
+        # Agents resolved on this connection, re-checked after CONFIG_CACHE_TTL
+        self._agents: Dict[Any, Tuple[AgentSnapshot, float]] = {}
+        # Executors (each with its own DB session) are reused across turns;
+        # concurrent turns each take a different one.
+        self._idle_executors: List[LangGraphExecutor] = []
+        self._last_seen = time.monotonic()
+        self._closed = False
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Send one JSON message; concurrent turns must not interleave frames."""
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    async def run(self) -> None:
+        """Serve the connection until the client goes away."""
+        await self.websocket.accept()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                data = await self.websocket.receive_text()
+                self._last_seen = time.monotonic()
+                await self._dispatch(data)
+        except WebSocketDisconnect:
+            # Client disconnected, that's okay
+            pass
+        finally:
+            self._closed = True
+            heartbeat.cancel()
+            # Cleanup must finish even if the server cancels this handler
+            await asyncio.shield(self._shutdown(heartbeat))
+
+    async def _shutdown(self, heartbeat: asyncio.Task) -> None:
+        """Cancel in-flight turns and release every database session."""
+        turns = list(self._turns.values())
+        for task in turns:
+            task.cancel()
+        await asyncio.gather(heartbeat, *turns, return_exceptions=True)
+        # Executors still in use close themselves in their turn's release
+        for executor in self._idle_executors:
+            await executor.db.close()
+
+    async def _dispatch(self, data: str) -> None:
+        """Handle one client message."""
+        try:
+            request = json.loads(data)
+            if not isinstance(request, dict):
+                raise ValueError
+        except ValueError:
+            await self.send({"type": "error", "request_id": None, "message": "Invalid JSON format"})
+            return
+
+        message_type = request.get("type", "chat")
+        if message_type == "ping":
+            await self.send({"type": "pong"})
+        elif message_type == "pong":
+            pass
+        elif message_type == "cancel":
+            await self._cancel(request.get("request_id"))
+        elif message_type == "chat":
+            await self._start_turn(request)
+        else:
+            await self.send({
                 "type": "error",
-                "message": "agent_id is required"
+                "request_id": request.get("request_id"),
+                "message": f"Unknown message type '{message_type}'"
             })
-            await websocket.close()
+
+    async def _start_turn(self, request: Dict[str, Any]) -> None:
+        """Run a chat request in the background so the socket keeps reading."""
+        request_id = str(request.get("request_id") or uuid.uuid4().hex)
+        if request_id in self._turns:
+            await self.send({"type": "error", "request_id": request_id, "message": "request_id is already in flight"})
             return
-        
-        # Get agent
-        agent = AgentService.get_agent(db, agent_id)
-        if not agent:
-            await websocket.send_json({
+        if len(self._turns) >= settings.WS_MAX_CONCURRENT_REQUESTS:
+            await self.send({
                 "type": "error",
-                "message": f"Agent with ID {agent_id} not found"
+                "request_id": request_id,
+                "message": f"Too many concurrent requests (max {settings.WS_MAX_CONCURRENT_REQUESTS})"
             })
-            await websocket.close()
             return
-        
-        if not agent.is_active:
-            await websocket.send_json({
-                "type": "error",
-                "message": f"Agent '{agent.name}' is not active"
+        task = asyncio.create_task(self._run_turn(request_id, request))
+        self._turns[request_id] = task
+        task.add_done_callback(lambda _: self._forget_turn(request_id))
+
+    def _forget_turn(self, request_id: str) -> None:
+        """Drop a finished turn."""
+        self._turns.pop(request_id, None)
+        self._generation_ids.pop(request_id, None)
+
+    async def _cancel(self, request_id: Optional[str]) -> None:
+        """Cancel an in-flight turn."""
+        task = self._turns.get(str(request_id)) if request_id is not None else None
+        if task is None:
+            await self.send({"type": "error", "request_id": request_id, "message": "No such request in flight"})
+            return
+        # Once generating, stop the run and let the turn report it; before
+        # that there is nothing to abort but the turn itself
+        generation_id = self._generation_ids.get(str(request_id))
+        if generation_id is None or not generation_registry.cancel(generation_id, reason="client"):
+            task.cancel()
+
+    async def _run_turn(self, request_id: str, request: Dict[str, Any]) -> None:
+        """Resolve the agent and stream one answer."""
+        executor = self._acquire_executor()
+        try:
+            agent = await self._resolve_agent(executor, request.get("agent_id"))
+            conversation_id = request.get("conversation_id")
+            if conversation_id is not None:
+                conversation = await ConversationService.get_conversation(executor.db, conversation_id)
+                if not conversation or conversation.agent_id != agent.id:
+                    raise RequestError(f"Conversation with ID {conversation_id} not found for agent {agent.id}")
+            messages = _convert_messages(self._parse_messages(request.get("messages", [])))
+
+            generation_id = self._generation_ids[request_id] = uuid.uuid4().hex
+            async for chunk in executor.execute(
+                agent,
+                messages,
+                stream=request.get("stream", True),
+                conversation_id=conversation_id,
+                request_id=generation_id,
+                client_id=fairness_key(self.session_id, conversation_id, self.address)
+            ):
+                await self.send({"type": "chunk", "request_id": request_id, "content": chunk})
+
+            if executor.cancelled:
+                await self.send({"type": "cancelled", "request_id": request_id})
+                return
+            await self.send({
+                "type": "done",
+                "request_id": request_id,
+                "conversation_id": conversation_id,
+                "first_token_ms": executor.first_token_ms,
+                "cached": executor.cache_hit
             })
-            await websocket.close()
+        except asyncio.CancelledError:
+            if not self._closed:
+                await self.send({"type": "cancelled", "request_id": request_id})
+        except AdmissionError as e:
+            await self._send_error(request_id, str(e), retry_after=e.retry_after)
+        except Exception as e:
+            await self._send_error(request_id, str(e))
+        finally:
+            # Shielded so a cancelled turn still hands its connection back
+            await asyncio.shield(self._release_executor(executor))
+
+    async def _send_error(self, request_id: str, message: str, **extra: Any) -> None:
+        """Report a failed turn unless the socket is already gone."""
+        if self._closed:
             return
-        
-        # Convert messages_data (list of dicts) to ChatMessage objects, then to LangChain messages
-        from app.schemas.pydantic_models import ChatMessage
-        
+        try:
+            await self.send({"type": "error", "request_id": request_id, "message": message, **extra})
+        except Exception:
+            pass
+
+    async def _resolve_agent(self, executor: LangGraphExecutor, agent_id: Any) -> AgentSnapshot:
+        """Resolve an agent, reusing the connection's copy while it is fresh."""
+        if not agent_id:
+            raise RequestError("agent_id is required")
+        agent, expires_at = self._agents.get(agent_id, (None, 0.0))
+        if agent is None or time.monotonic() >= expires_at:
+            agent = await AsyncAgentService.get_agent_config(executor.db, agent_id)
+            if not agent:
+                self._agents.pop(agent_id, None)
+                raise RequestError(f"Agent with ID {agent_id} not found")
+            self._agents[agent_id] = (agent, time.monotonic() + settings.CONFIG_CACHE_TTL)
+        if not agent.is_active:
+            raise RequestError(f"Agent '{agent.name}' is not active")
+        return agent
+
+    @staticmethod
+    def _parse_messages(messages_data: Any) -> List[ChatMessage]:
+        """Validate the request's messages."""
         chat_messages = []
-        for msg_dict in messages_data:
-            # Handle both dict format and ChatMessage format
-            if isinstance(msg_dict, dict):
-                # Ensure it has required fields
-                if "role" in msg_dict and "content" in msg_dict:
-                    chat_messages.append(ChatMessage(role=msg_dict["role"], content=msg_dict["content"]))
-                else:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": f"Invalid message format: missing 'role' or 'content'"
-                    })
-                    await websocket.close()
-                    return
-            elif hasattr(msg_dict, "role") and hasattr(msg_dict, "content"):
-                # Already a ChatMessage-like object
-                chat_messages.append(msg_dict)
-            else:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": f"Invalid message format"
-                })
-                await websocket.close()
+        for msg_dict in messages_data or []:
+            if not isinstance(msg_dict, dict) or "role" not in msg_dict or "content" not in msg_dict:
+                raise RequestError("Invalid message format: missing 'role' or 'content'")
+            chat_messages.append(ChatMessage(role=msg_dict["role"], content=msg_dict["content"]))
+        return chat_messages
+
+    def _acquire_executor(self) -> LangGraphExecutor:
+        """Take an idle executor, or create one with its own session."""
+        if self._idle_executors:
+            return self._idle_executors.pop()
+        return LangGraphExecutor(AsyncSessionLocal())
+
+    async def _release_executor(self, executor: LangGraphExecutor) -> None:
+        """Return an executor for the next turn, ending its transaction first."""
+        await executor.db.close()
+        self._idle_executors.append(executor)
+
+    async def _heartbeat(self) -> None:
+        """Ping the client and close the connection once it stops answering."""
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            if time.monotonic() - self._last_seen > settings.WS_HEARTBEAT_TIMEOUT:
+                await self.websocket.close(code=1001)
+                return
+            try:
+                await self.send({"type": "ping"})
+            except Exception:
                 return
-        
-        # Convert to LangChain messages
-        messages = _convert_messages(chat_messages)
-        
-        # Execute agent with streaming
-        executor = LangGraphExecutor(db)
-        
-        async for chunk in executor.execute(agent, messages, stream=stream):
-            await websocket.send_json({
-                "type": "chunk",
-                "content": chunk
-            })
-        
-        # Send done message
-        await websocket.send_json({
-            "type": "done"
-        })
-        
-    except json.JSONDecodeError:
-        await websocket.send_json({
-            "type": "error",
-            "message": "Invalid JSON format"
-        })
-    except WebSocketDisconnect:
-        # Client disconnected, that's okay
-        pass
-    except Exception as e:
-        await websocket.send_json({
-            "type": "error",
-            "message": str(e)
-        })
-    finally:
-        await websocket.close()
 
+
+async def websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for real-time chat streaming."""
+    await ChatConnection(websocket).run()
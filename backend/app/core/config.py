@@ -1,6 +1,6 @@
 """Application configuration settings."""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -8,6 +8,8 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./agentic_chatbot.db"
+    # Optional override; derived from DATABASE_URL (aiosqlite/asyncpg) when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
     
     # API
     API_V1_PREFIX: str = "/api/v1"
@@ -17,6 +19,78 @@ class Settings(BaseSettings):
     # Ollama
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.2"
+    OLLAMA_MAX_CONNECTIONS: int = 20
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0
+    OLLAMA_REQUEST_TIMEOUT: Optional[float] = None
+    OLLAMA_KEEP_ALIVE: Optional[str] = "30m"  # How long a model stays loaded after a request; agents can override
+    OLLAMA_NUM_CTX: Optional[int] = None  # Context window in tokens; None sizes it to the prompt budget plus CONTEXT_REPLY_TOKENS; agents can override
+    LLM_CLIENT_IDLE_TTL: float = 900.0
+    LLM_CLIENT_MAX_CLIENTS: int = 32
+    LLM_CLIENT_EVICTION_INTERVAL: float = 60.0
+    
+    # Executor
+    GRAPH_CACHE_MAX_SIZE: int = 128
+    CONFIG_CACHE_TTL: float = 300.0
+    CONFIG_CACHE_MAX_SIZE: int = 1024
+    
+    # Model residency
+    MODEL_RESIDENCY_ENABLED: bool = True  # Preload and keep loaded the models of active agents
+    MODEL_RESIDENCY_INTERVAL: float = 60.0  # Seconds between checks of Ollama's loaded models
+    MODEL_RESIDENCY_MAX_MODELS: int = 2  # Models kept loaded, busiest first; match Ollama's OLLAMA_MAX_LOADED_MODELS
+    MODEL_RESIDENCY_TRAFFIC_HALF_LIFE: float = 900.0  # Seconds for a model's recent-traffic score to halve
+    MODEL_RESIDENCY_LOAD_TIMEOUT: float = 300.0  # Longest wait for Ollama to load a model
+    
+    # Model catalog
+    MODEL_CATALOG_TTL: float = 30.0  # Seconds before the cached Ollama model list is refreshed in the background
+    MODEL_CATALOG_FETCH_TIMEOUT: float = 10.0
+    
+    # Admission control
+    SCHEDULER_MODEL_CONCURRENCY: int = 2  # Concurrent runs per model; match Ollama's OLLAMA_NUM_PARALLEL
+    SCHEDULER_MODEL_CONCURRENCY_OVERRIDES: Dict[str, int] = {}  # Per-model overrides, e.g. {"llama3.2": 4}
+    SCHEDULER_MAX_QUEUE: int = 32  # Waiting runs per model before rejecting with 429
+    SCHEDULER_QUEUE_TIMEOUT: float = 30.0  # Longest wait for a slot before failing with 503
+    
+    # Response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: float = 3600.0
+    RESPONSE_CACHE_MAX_SIZE: int = 1024
+    RESPONSE_CACHE_SAMPLED: bool = False  # Also cache agents with temperature > 0
+    RESPONSE_CACHE_SEMANTIC: bool = False  # Reuse answers to near-identical questions
+    RESPONSE_CACHE_EMBEDDING_MODEL: str = "nomic-embed-text"
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # Cosine similarity for a semantic hit
+    
+    # Generations
+    GENERATION_DURATION_SMOOTHING: float = 0.2  # Weight of the newest run in per-model mean durations
+    GENERATION_COALESCING: bool = True  # Identical in-flight requests share one run
+    GENERATION_COALESCE_SAMPLED: bool = False  # Also share runs of agents with temperature > 0
+    
+    # WebSocket sessions
+    WS_HEARTBEAT_INTERVAL: float = 30.0
+    WS_HEARTBEAT_TIMEOUT: float = 90.0  # Close if nothing is heard from the client this long
+    WS_MAX_CONCURRENT_REQUESTS: int = 4
+    
+    # Context window
+    CONTEXT_TOKEN_BUDGET: int = 3072  # Prompt tokens per request, leaving room for the reply
+    CONTEXT_MODEL_TOKEN_BUDGETS: Dict[str, int] = {}  # Per-model overrides, e.g. {"llama3.2": 6000}
+    CONTEXT_REPLY_TOKENS: int = 1024  # With a configured num_ctx, the budget is num_ctx minus this; otherwise num_ctx is the budget plus this
+    CONTEXT_CHARS_PER_TOKEN: float = 4.0
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 256
+    CONTEXT_SUMMARY_CHUNK_MESSAGES: int = 6
+    CONTEXT_CACHE_MAX_SIZE: int = 4096
+    
+    # Builtin tools
+    BUILTIN_TOOLS_WARMUP: bool = False
+    PDF_EXTRACTION_WORKERS: Optional[int] = None  # Shared extraction process pool size; None picks min(4, CPU count)
+    PDF_TOOL_UPLOAD_DIR: str = "./uploads"  # Agents may only read PDFs (file_path) from this directory
+    PDF_CACHE_ENABLED: bool = True
+    PDF_CACHE_PATH: str = "./cache/pdf_extraction.sqlite3"
+    PDF_CACHE_MAX_DISK_BYTES: int = 512 * 1024 * 1024
+    PDF_CACHE_MAX_MEMORY_BYTES: int = 64 * 1024 * 1024
+    TOOL_DEFAULT_TIMEOUT: float = 60.0
+    TOOL_EXECUTOR_WORKERS: int = 4
+    TOOL_RESULT_CACHE_TTL: float = 600.0
+    TOOL_RESULT_CACHE_MAX_SIZE: int = 256
     
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -24,11 +98,25 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     
+    # Outbound HTTP
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_TIMEOUT: float = 60.0
+    
     # Databricks
     DATABRICKS_URL: Optional[str] = None
     DATABRICKS_TOKEN: Optional[str] = None
     DATABRICKS_NOTEBOOK_PATH: Optional[str] = None
     DATABRICKS_VOLUME_PATH: Optional[str] = None
+    DATABRICKS_UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    OCR_MAX_IN_FLIGHT_RUNS: int = 4
+    OCR_POLL_INITIAL_INTERVAL: float = 2.0
+    OCR_POLL_MAX_INTERVAL: float = 60.0
+    OCR_POLL_CONCURRENCY: int = 8
+    OCR_BACKEND: str = "auto"  # auto, local or databricks
+    OCR_LOCAL_MAX_PAGES: int = 5
+    OCR_LOCAL_MAX_BYTES: int = 5 * 1024 * 1024
+    OCR_LOCAL_WORKERS: int = 2
     
     class Config:
         env_file = ".env"
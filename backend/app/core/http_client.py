@@ -0,0 +1,40 @@
+"""Application-wide pooled HTTP client for outbound calls."""
+from typing import Optional
+import httpx
+from .config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    """Create an AsyncClient with the configured connection pool."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT)
+    )
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """Create the shared client (called from the FastAPI lifespan)."""
+    global _client
+    _client = _create_client()
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it lazily outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
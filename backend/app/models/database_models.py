@@ -15,6 +15,8 @@ class Agent(Base):
     system_prompt = Column(Text, nullable=False)
     model = Column(String(50), default="llama3.2")
     temperature = Column(String(10), default="0.7")
+    keep_alive = Column(String(20), nullable=True)  # Ollama keep_alive, e.g. "30m" or "-1"; default when null
+    num_ctx = Column(Integer, nullable=True)  # Ollama context window; default when null
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -41,4 +43,46 @@ class Tool(Base):
     agent = relationship("Agent", back_populates="tools")
 
 
+class OCRJob(Base):
+    """OCR job model tracking a document through remote processing."""
+    __tablename__ = "ocr_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)
+    backend = Column(String(20), nullable=False, default="databricks", server_default="databricks")  # databricks, local
+    volume_path = Column(String(1024), nullable=True)  # Uploaded location in Databricks
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, submitted, running, succeeded, failed
+    run_id = Column(String(64), nullable=True, index=True)  # Databricks run ID
+    state_message = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)  # Cached job output
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class Conversation(Base):
+    """Conversation model holding the server-side history of a chat."""
+    __tablename__ = "conversations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False, index=True)
+    title = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    messages = relationship("Message", back_populates="conversation", order_by="Message.id", cascade="all, delete-orphan")
 
+
+class Message(Base):
+    """Message model; rows are only ever appended to a conversation."""
+    __tablename__ = "messages"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    role = Column(String(20), nullable=False)  # user, assistant, system
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    conversation = relationship("Conversation", back_populates="messages")
@@ -3,6 +3,9 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+# Ollama keep_alive: seconds ("-1" keeps the model loaded) or a duration like "30m" / "1h30m"
+KEEP_ALIVE_PATTERN = r"^-?\d+$|^-?(\d+(\.\d+)?(ns|us|ms|s|m|h))+$"
+
 
 # Agent Schemas
 class AgentBase(BaseModel):
@@ -12,6 +15,8 @@ class AgentBase(BaseModel):
     system_prompt: str = Field(..., min_length=1)
     model: str = "llama3.2"
     temperature: str = "0.7"
+    keep_alive: Optional[str] = Field(None, max_length=20, pattern=KEEP_ALIVE_PATTERN)
+    num_ctx: Optional[int] = Field(None, ge=256)
     is_active: bool = True
 
 
@@ -27,6 +32,8 @@ class AgentUpdate(BaseModel):
     system_prompt: Optional[str] = Field(None, min_length=1)
     model: Optional[str] = None
     temperature: Optional[str] = None
+    keep_alive: Optional[str] = Field(None, max_length=20, pattern=KEEP_ALIVE_PATTERN)
+    num_ctx: Optional[int] = Field(None, ge=256)
     is_active: Optional[bool] = None
 
 
@@ -84,16 +91,77 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    """Schema for chat request."""
+    """Schema for chat request.
+    
+    With a conversation_id, messages holds only the new turn; earlier
+    messages are loaded from the conversation store. A client-chosen
+    request_id lets the request be cancelled while it runs.
+    """
     agent_id: int
     messages: List[ChatMessage]
     stream: bool = False
+    conversation_id: Optional[int] = None
+    request_id: Optional[str] = Field(None, max_length=100)
 
 
 class ChatResponse(BaseModel):
     """Schema for chat response."""
     response: str
     agent_id: int
+    conversation_id: Optional[int] = None
+    request_id: Optional[str] = None
+    cancelled: bool = False
+    cached: bool = False
+
+
+# Conversation Schemas
+class ConversationCreate(BaseModel):
+    """Schema for creating a conversation, optionally seeded with earlier messages."""
+    agent_id: int
+    title: Optional[str] = Field(None, max_length=255)
+    messages: List[ChatMessage] = []
+
+
+class MessageResponse(BaseModel):
+    """Schema for a stored conversation message."""
+    id: int
+    role: str
+    content: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ConversationResponse(BaseModel):
+    """Schema for conversation response."""
+    id: int
+    agent_id: int
+    title: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
 
 
+class ConversationWithMessages(ConversationResponse):
+    """Schema for a conversation including its messages."""
+    messages: List[MessageResponse] = []
 
+
+# OCR Schemas
+class OCRJobResponse(BaseModel):
+    """Schema for OCR job response."""
+    id: int
+    filename: str
+    backend: str
+    status: str
+    run_id: Optional[str] = None
+    state_message: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -1,8 +1,12 @@
 """Service for agent CRUD operations."""
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from app.models.database_models import Agent
+from app.models.database_models import Agent, Conversation, Message
 from app.schemas.pydantic_models import AgentCreate, AgentUpdate
+from app.services.config_cache import AgentSnapshot, agent_config_cache, invalidate_agent_caches
+from app.services.conversation_service import ConversationService
 
 
 class AgentService:
@@ -50,6 +54,7 @@ class AgentService:
         
         db.commit()
         db.refresh(db_agent)
+        invalidate_agent_caches(agent_id)
         return db_agent
     
     @staticmethod
@@ -59,9 +64,95 @@ class AgentService:
         if not db_agent:
             return False
         
+        # Bulk-delete history instead of loading every message through a cascade
+        conversation_ids = select(Conversation.id).where(Conversation.agent_id == agent_id)
+        db.execute(delete(Message).where(Message.conversation_id.in_(conversation_ids)))
+        db.execute(delete(Conversation).where(Conversation.agent_id == agent_id))
         db.delete(db_agent)
         db.commit()
+        invalidate_agent_caches(agent_id)
         return True
 
 
-
+class AsyncAgentService:
+    """Async service class for agent operations."""
+    
+    @staticmethod
+    async def create_agent(db: AsyncSession, agent: AgentCreate) -> Agent:
+        """Create a new agent."""
+        db_agent = Agent(**agent.model_dump())
+        db.add(db_agent)
+        await db.commit()
+        await db.refresh(db_agent)
+        return db_agent
+    
+    @staticmethod
+    async def get_agent(db: AsyncSession, agent_id: int) -> Optional[Agent]:
+        """Get agent by ID."""
+        result = await db.execute(select(Agent).where(Agent.id == agent_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_agent_config(db: AsyncSession, agent_id: int) -> Optional[AgentSnapshot]:
+        """Get a cached, detached snapshot of an agent, reading through to the DB on a miss."""
+        found, snapshot = agent_config_cache.agents.get(agent_id)
+        if found:
+            return snapshot
+        
+        db_agent = await AsyncAgentService.get_agent(db, agent_id)
+        if not db_agent:
+            return None
+        snapshot = AgentSnapshot.from_model(db_agent)
+        agent_config_cache.agents.set(agent_id, snapshot)
+        return snapshot
+    
+    @staticmethod
+    async def get_agent_by_name(db: AsyncSession, name: str) -> Optional[Agent]:
+        """Get agent by name."""
+        result = await db.execute(select(Agent).where(Agent.name == name))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_all_agents(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Agent]:
+        """Get all agents."""
+        result = await db.execute(select(Agent).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_active_agents(db: AsyncSession) -> List[Agent]:
+        """Get all active agents."""
+        result = await db.execute(select(Agent).where(Agent.is_active == True))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def update_agent(db: AsyncSession, agent_id: int, agent_update: AgentUpdate) -> Optional[Agent]:
+        """Update an agent."""
+        db_agent = await AsyncAgentService.get_agent(db, agent_id)
+        if not db_agent:
+            return None
+        
+        update_data = agent_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_agent, field, value)
+        
+        await db.commit()
+        await db.refresh(db_agent)
+        invalidate_agent_caches(agent_id)
+        return db_agent
+    
+    @staticmethod
+    async def delete_agent(db: AsyncSession, agent_id: int) -> bool:
+        """Delete an agent."""
+        # Eager-load tools: the delete cascade cannot lazy-load under asyncio
+        result = await db.execute(
+            select(Agent).options(selectinload(Agent.tools)).where(Agent.id == agent_id)
+        )
+        db_agent = result.scalars().first()
+        if not db_agent:
+            return False
+        
+        await ConversationService.delete_agent_conversations(db, agent_id)
+        await db.delete(db_agent)
+        await db.commit()
+        invalidate_agent_caches(agent_id)
+        return True
@@ -0,0 +1,169 @@
+"""Read-through cache of agent and tool configuration snapshots."""
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from app.core.config import settings
+from app.services.graph_cache import graph_cache
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class AgentSnapshot:
+    """Detached, immutable copy of an Agent row."""
+    id: int
+    name: str
+    description: Optional[str]
+    system_prompt: str
+    model: str
+    temperature: str
+    keep_alive: Optional[str]
+    num_ctx: Optional[int]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, agent: Any) -> "AgentSnapshot":
+        """Copy the loaded column values of an Agent model."""
+        return cls(
+            id=agent.id,
+            name=agent.name,
+            description=agent.description,
+            system_prompt=agent.system_prompt,
+            model=agent.model,
+            temperature=agent.temperature,
+            keep_alive=agent.keep_alive,
+            num_ctx=agent.num_ctx,
+            is_active=agent.is_active,
+            created_at=agent.created_at,
+            updated_at=agent.updated_at,
+        )
+
+
+@dataclass(frozen=True)
+class ToolSnapshot:
+    """Detached, immutable copy of a Tool row."""
+    id: int
+    name: str
+    description: str
+    tool_type: str
+    implementation: Optional[str]
+    parameters_json: Optional[str]
+    agent_id: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @property
+    def parameters(self) -> Optional[Dict[str, Any]]:
+        """Return a fresh copy of the tool parameter schema."""
+        return json.loads(self.parameters_json) if self.parameters_json is not None else None
+
+    @classmethod
+    def from_model(cls, tool: Any) -> "ToolSnapshot":
+        """Copy the loaded column values of a Tool model."""
+        return cls(
+            id=tool.id,
+            name=tool.name,
+            description=tool.description,
+            tool_type=tool.tool_type,
+            implementation=tool.implementation,
+            parameters_json=json.dumps(tool.parameters) if tool.parameters is not None else None,
+            agent_id=tool.agent_id,
+            created_at=tool.created_at,
+            updated_at=tool.updated_at,
+        )
+
+
+class TTLCache(Generic[T]):
+    """Thread-safe LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, ttl: float, max_size: int):
+        """Initialize an empty cache."""
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Optional[T]]:
+        """Return (found, value) for a key, dropping it if expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: T, ttl: Optional[float] = None) -> None:
+        """Store a value (optionally with its own TTL), evicting LRU entries over capacity."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class AgentConfigCache:
+    """Snapshots of agents (by id) and of each agent's tool list."""
+
+    def __init__(self, ttl: float, max_size: int):
+        """Initialize the agent and tool caches."""
+        self.agents: TTLCache[AgentSnapshot] = TTLCache(ttl, max_size)
+        self.tools: TTLCache[Tuple[ToolSnapshot, ...]] = TTLCache(ttl, max_size)
+
+    def invalidate_agent(self, agent_id: Optional[int]) -> None:
+        """Drop the cached agent snapshot and tool list for an agent."""
+        if agent_id is None:
+            return
+        self.agents.invalidate(agent_id)
+        self.tools.invalidate(agent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return stats for both caches."""
+        return {"agents": self.agents.stats(), "tools": self.tools.stats()}
+
+
+agent_config_cache = AgentConfigCache(
+    ttl=settings.CONFIG_CACHE_TTL,
+    max_size=settings.CONFIG_CACHE_MAX_SIZE
+)
+
+
+def invalidate_agent_caches(agent_id: Optional[int]) -> None:
+    """Invalidate every per-agent cache after an agent or tool write."""
+    agent_config_cache.invalidate_agent(agent_id)
+    graph_cache.invalidate_agent(agent_id)
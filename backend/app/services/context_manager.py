@@ -0,0 +1,245 @@
+"""Keeps agent prompts within a per-model token budget."""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.constants import TAG_NOSTREAM
+from app.core.config import settings
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below for an assistant that will continue it. "
+    "Keep facts, names, numbers, decisions and open questions; drop pleasantries. "
+    "Reply with the summary only."
+)
+
+
+def _message_digest(message: BaseMessage) -> str:
+    """Content hash of a message, stable across requests (ids are not)."""
+    digest = hashlib.sha256(message.type.encode("utf-8"))
+    digest.update(str(message.content).encode("utf-8"))
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        digest.update(repr([(call.get("name"), call.get("args")) for call in tool_calls]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _LRU:
+    """Minimal thread-safe LRU map."""
+
+    def __init__(self, max_size: int):
+        """Initialize an empty map."""
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the value for a key, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry over capacity."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Number of entries."""
+        return len(self._entries)
+
+
+class ContextManager:
+    """Fits a conversation into a model's token budget.
+
+    The system prompt and the most recent turns are kept verbatim; older
+    turns are replaced by a rolling summary. Summaries are cached by a hash
+    chain over the summarized prefix, so a longer prefix is summarized
+    incrementally from the previous summary plus only the new messages.
+    """
+
+    def __init__(
+        self,
+        default_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+        model_budgets: Optional[Dict[str, int]] = None,
+        reply_tokens: int = settings.CONTEXT_REPLY_TOKENS,
+        chars_per_token: float = settings.CONTEXT_CHARS_PER_TOKEN,
+        summary_max_tokens: int = settings.CONTEXT_SUMMARY_MAX_TOKENS,
+        summary_chunk_messages: int = settings.CONTEXT_SUMMARY_CHUNK_MESSAGES,
+        cache_size: int = settings.CONTEXT_CACHE_MAX_SIZE
+    ):
+        """Initialize budgets and caches."""
+        self.default_budget = default_budget
+        self.model_budgets = dict(model_budgets if model_budgets is not None else settings.CONTEXT_MODEL_TOKEN_BUDGETS)
+        self.reply_tokens = reply_tokens
+        self.chars_per_token = chars_per_token
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_chunk_messages = max(1, summary_chunk_messages)
+        self._token_counts = _LRU(cache_size)
+        self._summaries = _LRU(cache_size)
+        self.trimmed_requests = 0
+        self.summaries_built = 0
+        self.summary_reuses = 0
+
+    def budget_for(self, model: str, num_ctx: Optional[int] = None) -> int:
+        """Prompt token budget for a model (agent num_ctx, exact name, then name without tag)."""
+        if num_ctx:
+            return max(num_ctx - self.reply_tokens, num_ctx // 2)
+        if model in self.model_budgets:
+            return self.model_budgets[model]
+        return self.model_budgets.get(model.split(":")[0], self.default_budget)
+
+    def num_ctx_for(self, model: str, num_ctx: Optional[int] = None) -> int:
+        """Context window to request: the agent's or configured num_ctx, else the budget plus the reply.
+
+        Always sent to Ollama, since the model's own default (often 2048)
+        may be smaller than the budget and would silently truncate prompts.
+        """
+        return num_ctx or settings.OLLAMA_NUM_CTX or self.budget_for(model) + self.reply_tokens
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        """Approximate token count of a message, cached by content."""
+        key = _message_digest(message)
+        count = self._token_counts.get(key)
+        if count is None:
+            text = str(message.content)
+            tool_calls = getattr(message, "tool_calls", None)
+            if tool_calls:
+                text += repr(tool_calls)
+            # Per-message overhead covers role markers added by the chat template
+            count = math.ceil(len(text) / self.chars_per_token) + 4
+            self._token_counts.set(key, count)
+        return count
+
+    async def fit(
+        self,
+        model: str,
+        system_message: SystemMessage,
+        messages: Sequence[BaseMessage],
+        summarize: Callable[[List[BaseMessage]], Awaitable[str]],
+        num_ctx: Optional[int] = None
+    ) -> List[BaseMessage]:
+        """Return the prompt for a model: system prompt, optional summary, recent turns."""
+        budget = self.budget_for(model, num_ctx)
+        counts = [self.count_tokens(message) for message in messages]
+        system_tokens = self.count_tokens(system_message)
+        if not messages or system_tokens + sum(counts) <= budget:
+            return [system_message, *messages]
+
+        self.trimmed_requests += 1
+        cut = self._cut_index(messages, counts, budget - system_tokens - self.summary_max_tokens)
+        recent = list(messages[cut:])
+        older = list(messages[:cut])
+        if not older:
+            return [system_message, *recent]
+
+        try:
+            summary = await self._summary_for(older, summarize)
+        except Exception as e:
+            # Better a truncated prompt than a failed turn
+            print(f"Context summary failed, dropping {len(older)} older messages: {e}")
+            return [system_message, *recent]
+        return [system_message, SystemMessage(content=SUMMARY_PREFIX + summary), *recent]
+
+    def _cut_index(self, messages: Sequence[BaseMessage], counts: List[int], available: int) -> int:
+        """Index of the first message kept verbatim."""
+        cut = len(messages)
+        used = 0
+        while cut > 0 and used + counts[cut - 1] <= available:
+            cut -= 1
+            used += counts[cut]
+        # Always keep the latest message, even if it alone exceeds the budget
+        cut = min(cut, len(messages) - 1)
+
+        # Summarize in whole chunks so the summarized prefix, and its cached
+        # summary, stays the same for several turns
+        if cut > 0:
+            cut = min(math.ceil(cut / self.summary_chunk_messages) * self.summary_chunk_messages, len(messages) - 1)
+
+        # Never start on tool results whose tool-calling AI message was cut off:
+        # skip past them, or keep that AI message if the results are the latest turn
+        if isinstance(messages[cut], ToolMessage):
+            forward = cut
+            while forward < len(messages) and isinstance(messages[forward], ToolMessage):
+                forward += 1
+            if forward < len(messages):
+                cut = forward
+            else:
+                while cut > 0 and isinstance(messages[cut], ToolMessage):
+                    cut -= 1
+        return cut
+
+    async def _summary_for(
+        self,
+        older: List[BaseMessage],
+        summarize: Callable[[List[BaseMessage]], Awaitable[str]]
+    ) -> str:
+        """Summary of a message prefix, extending the longest cached shorter prefix."""
+        chain: List[str] = []
+        running = hashlib.sha256()
+        for message in older:
+            running.update(_message_digest(message).encode("utf-8"))
+            chain.append(running.hexdigest())
+
+        cached = self._summaries.get(chain[-1])
+        if cached is not None:
+            self.summary_reuses += 1
+            return cached
+
+        start, previous = 0, None
+        for i in range(len(chain) - 2, -1, -1):
+            previous = self._summaries.get(chain[i])
+            if previous is not None:
+                start = i + 1
+                break
+
+        prompt: List[BaseMessage] = [SystemMessage(content=SUMMARY_INSTRUCTIONS)]
+        transcript = "\n".join(_transcript_line(message) for message in older[start:])
+        if previous is not None:
+            transcript = f"Summary so far:\n{previous}\n\nNew messages:\n{transcript}"
+        prompt.append(HumanMessage(content=transcript))
+
+        summary = (await summarize(prompt)).strip()
+        # The summary's share of the budget is fixed, however long the model runs on
+        summary = summary[:int(self.summary_max_tokens * self.chars_per_token)]
+        self._summaries.set(chain[-1], summary)
+        self.summaries_built += 1
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache sizes and counters."""
+        return {
+            "default_budget": self.default_budget,
+            "token_counts_cached": len(self._token_counts),
+            "summaries_cached": len(self._summaries),
+            "trimmed_requests": self.trimmed_requests,
+            "summaries_built": self.summaries_built,
+            "summary_reuses": self.summary_reuses,
+        }
+
+
+def _transcript_line(message: BaseMessage) -> str:
+    """Render a message as one transcript entry for summarization."""
+    if isinstance(message, ToolMessage):
+        return f"Tool {message.name or ''} result: {message.content}"
+    if isinstance(message, AIMessage) and message.tool_calls and not message.content:
+        calls = ", ".join(call.get("name", "") for call in message.tool_calls)
+        return f"Assistant called tools: {calls}"
+    role = {"human": "User", "ai": "Assistant", "system": "System"}.get(message.type, message.type)
+    return f"{role}: {message.content}"
+
+
+def summary_config() -> Dict[str, Any]:
+    """Runnable config for summary calls: hidden from token streaming."""
+    return {"tags": [TAG_NOSTREAM]}
+
+
+context_manager = ContextManager()
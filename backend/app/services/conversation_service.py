@@ -0,0 +1,114 @@
+"""Service for server-side conversation history."""
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Iterable, List, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from app.models.database_models import Conversation, Message
+
+_MESSAGE_CLASSES = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
+_MESSAGE_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+
+def message_role(message: BaseMessage) -> Optional[str]:
+    """Stored role for a LangChain message (None for tool messages)."""
+    return _MESSAGE_ROLES.get(message.type)
+
+
+def to_langchain_message(role: str, content: str) -> BaseMessage:
+    """Build the LangChain message for a stored role and content."""
+    return _MESSAGE_CLASSES.get(role, HumanMessage)(content=content)
+
+
+class ConversationService:
+    """Service class for conversation operations."""
+
+    @staticmethod
+    async def create_conversation(
+        db: AsyncSession,
+        agent_id: int,
+        title: Optional[str] = None,
+        messages: Iterable[Tuple[str, str]] = ()
+    ) -> Conversation:
+        """Create a conversation, optionally seeded with (role, content) pairs."""
+        db_conversation = Conversation(agent_id=agent_id, title=title)
+        db.add(db_conversation)
+        await db.flush()
+        db.add_all(
+            Message(conversation_id=db_conversation.id, role=role, content=content)
+            for role, content in messages
+        )
+        await db.commit()
+        await db.refresh(db_conversation)
+        return db_conversation
+
+    @staticmethod
+    async def get_conversation(db: AsyncSession, conversation_id: int) -> Optional[Conversation]:
+        """Get conversation by ID (without messages)."""
+        result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_conversation_with_messages(db: AsyncSession, conversation_id: int) -> Optional[Conversation]:
+        """Get conversation by ID with its messages loaded."""
+        result = await db.execute(
+            select(Conversation)
+            .options(selectinload(Conversation.messages))
+            .where(Conversation.id == conversation_id)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_conversations(
+        db: AsyncSession,
+        agent_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Conversation]:
+        """Get conversations, most recently created first."""
+        query = select(Conversation)
+        if agent_id is not None:
+            query = query.where(Conversation.agent_id == agent_id)
+        result = await db.execute(query.order_by(Conversation.id.desc()).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_history(db: AsyncSession, conversation_id: int) -> List[BaseMessage]:
+        """Load a conversation's messages, oldest first, as LangChain messages."""
+        result = await db.execute(
+            select(Message.role, Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id)
+        )
+        return [to_langchain_message(role, content) for role, content in result.all()]
+
+    @staticmethod
+    async def append_messages(db: AsyncSession, conversation_id: int, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to a conversation; existing rows are never rewritten."""
+        rows = [
+            Message(conversation_id=conversation_id, role=role, content=str(message.content))
+            for message in messages
+            if (role := message_role(message)) is not None and message.content
+        ]
+        if not rows:
+            return
+        db.add_all(rows)
+        await db.execute(
+            update(Conversation).where(Conversation.id == conversation_id).values(updated_at=func.now())
+        )
+        await db.commit()
+
+    @staticmethod
+    async def delete_conversation(db: AsyncSession, conversation_id: int) -> bool:
+        """Delete a conversation and its messages."""
+        await db.execute(delete(Message).where(Message.conversation_id == conversation_id))
+        result = await db.execute(delete(Conversation).where(Conversation.id == conversation_id))
+        await db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def delete_agent_conversations(db: AsyncSession, agent_id: int) -> None:
+        """Delete every conversation of an agent without loading it (caller commits)."""
+        conversation_ids = select(Conversation.id).where(Conversation.agent_id == agent_id)
+        await db.execute(delete(Message).where(Message.conversation_id.in_(conversation_ids)))
+        await db.execute(delete(Conversation).where(Conversation.agent_id == agent_id))
@@ -0,0 +1,118 @@
+"""Async client for the Databricks Files and Jobs APIs."""
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import quote
+import httpx
+from app.core.config import settings
+from app.core.http_client import get_http_client
+
+
+class DatabricksError(Exception):
+    """Raised when a Databricks API call fails."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        """Store the error message and the upstream HTTP status, if any."""
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DatabricksClient:
+    """Thin async wrapper over the Databricks REST API using the shared HTTP pool."""
+
+    def __init__(self, base_url: str, token: str, http_client: Optional[httpx.AsyncClient] = None):
+        """Initialize the client for a workspace URL and access token."""
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self._http_client = http_client
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """HTTP client used for requests."""
+        return self._http_client or get_http_client()
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Authorization headers for every request."""
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, reporting transport failures (unreachable, timeout) as DatabricksError."""
+        try:
+            return await self.http.request(method, f"{self.base_url}{path}", **kwargs)
+        except httpx.HTTPError as e:
+            raise DatabricksError(f"Databricks request failed: {type(e).__name__}: {e}") from e
+
+    async def upload_file(
+        self,
+        volume_path: str,
+        filename: str,
+        chunks: AsyncIterator[bytes],
+        size: Optional[int] = None
+    ) -> str:
+        """Stream a file into a Unity Catalog volume and return its volume path."""
+        target = f"{volume_path.rstrip('/')}/{filename}"
+        headers = dict(self.headers)
+        headers["Content-Type"] = "application/octet-stream"
+        if size is not None:
+            # Known length: send a sized body instead of chunked transfer encoding
+            headers["Content-Length"] = str(size)
+        response = await self._request(
+            "PUT",
+            f"/api/2.0/fs/files{quote(target)}",
+            params={"overwrite": "true"},
+            headers=headers,
+            content=chunks
+        )
+        if response.status_code not in (200, 201, 204):
+            raise DatabricksError(f"Failed to upload to Databricks Volume: {response.text}", response.status_code)
+        return target
+
+    async def submit_notebook_run(self, run_name: str, notebook_path: str, base_parameters: Dict[str, str]) -> Dict[str, Any]:
+        """Submit a one-time notebook run and return the API response."""
+        payload = {
+            "run_name": run_name,
+            "tasks": [{
+                "task_key": "ocr_task",
+                "notebook_task": {
+                    "notebook_path": notebook_path,
+                    "base_parameters": base_parameters
+                }
+            }]
+        }
+        response = await self._request(
+            "POST",
+            "/api/2.1/jobs/runs/submit",
+            headers=self.headers,
+            json=payload
+        )
+        if response.status_code != 200:
+            raise DatabricksError(f"Failed to trigger Databricks job: {response.text}", response.status_code)
+        return response.json()
+
+    async def get_run(self, run_id: str) -> Dict[str, Any]:
+        """Get the state of a run."""
+        response = await self._request(
+            "GET",
+            "/api/2.1/jobs/runs/get",
+            headers=self.headers,
+            params={"run_id": run_id}
+        )
+        if response.status_code != 200:
+            raise DatabricksError(f"Failed to get Databricks run {run_id}: {response.text}", response.status_code)
+        return response.json()
+
+    async def get_run_output(self, run_id: str) -> Dict[str, Any]:
+        """Get the output of a single task run."""
+        response = await self._request(
+            "GET",
+            "/api/2.1/jobs/runs/get-output",
+            headers=self.headers,
+            params={"run_id": run_id}
+        )
+        if response.status_code != 200:
+            raise DatabricksError(f"Failed to get output of Databricks run {run_id}: {response.text}", response.status_code)
+        return response.json()
+
+
+def get_databricks_client() -> DatabricksClient:
+    """Build a client from settings."""
+    return DatabricksClient(settings.DATABRICKS_URL, settings.DATABRICKS_TOKEN)
@@ -0,0 +1,227 @@
+"""Registry of in-flight agent generations, shared and cancellable."""
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+
+# Queue markers: the run is over / this request was cancelled
+_END = object()
+_CANCELLED = object()
+
+
+class DuplicateRequestError(Exception):
+    """A request with the same id is still running."""
+
+
+class Generation:
+    """One model run and everything it has produced so far.
+
+    Every request subscribed to the run receives the full output: a late
+    subscriber first replays the buffered chunks, then follows live.
+    """
+
+    def __init__(self, key: str, agent_id: int, model: str, admission: Any = None):
+        """Initialize a run that has not started yet."""
+        self.key = key
+        self.agent_id = agent_id
+        self.model = model
+        self.admission = admission
+        self.task: Optional[asyncio.Task] = None
+        self.chunks: List[str] = []
+        self.finished = False
+        self.started = time.perf_counter()
+        self.subscribers: Dict[str, "Subscription"] = {}
+
+    def publish(self, chunk: str) -> None:
+        """Append a chunk and hand it to every subscriber."""
+        self.chunks.append(chunk)
+        for subscription in self.subscribers.values():
+            subscription.queue.put_nowait(chunk)
+
+    def _close(self) -> None:
+        """Mark the output complete."""
+        self.finished = True
+        for subscription in self.subscribers.values():
+            subscription.queue.put_nowait(_END)
+
+
+class Subscription:
+    """One request's view of a run; iterate it for the output chunks."""
+
+    def __init__(self, generation: Generation, request_id: str):
+        """Initialize with the chunks produced so far."""
+        # Keyed by its own id in the run, so client-chosen request ids never collide there
+        self.id = uuid.uuid4().hex
+        self.generation = generation
+        self.request_id = request_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.cancel_reason: Optional[str] = None
+        for chunk in generation.chunks:
+            self.queue.put_nowait(chunk)
+        if generation.finished:
+            self.queue.put_nowait(_END)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether this request was cancelled."""
+        return self.cancel_reason is not None
+
+    def __aiter__(self) -> "Subscription":
+        """Iterate output chunks until the run ends or the request is cancelled."""
+        return self
+
+    async def __anext__(self) -> str:
+        """Next output chunk."""
+        chunk = await self.queue.get()
+        if chunk is _END or chunk is _CANCELLED:
+            raise StopAsyncIteration
+        return chunk
+
+
+class GenerationRegistry:
+    """Tracks running generations, shares identical ones and cancels them.
+
+    Requests carrying the same coalescing key while a run is in flight
+    subscribe to that run instead of starting another. Cancelling a request
+    (by request id, or by its consumer going away) detaches it; the run
+    itself, and with it the in-flight Ollama HTTP request, is cancelled once
+    no subscriber is left. Saved time is estimated from a moving average of
+    how long completed runs of the same model took.
+    """
+
+    def __init__(self, duration_smoothing: float = settings.GENERATION_DURATION_SMOOTHING):
+        """Initialize an empty registry."""
+        self.duration_smoothing = duration_smoothing
+        self._runs: Dict[str, Generation] = {}
+        # Live request ids; None until the request has subscribed to a run
+        self._requests: Dict[str, Optional[Subscription]] = {}
+        self._mean_duration: Dict[str, float] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.cancelled: Dict[str, int] = {}
+        self.aborted_runs = 0
+        self.cancelled_elapsed_seconds = 0.0
+        self.estimated_saved_seconds = 0.0
+
+    def is_live(self, request_id: str) -> bool:
+        """Whether a request with this id is running."""
+        return request_id in self._requests
+
+    def claim(self, request_id: str) -> None:
+        """Reserve a request id for the caller's whole request."""
+        if request_id in self._requests:
+            raise DuplicateRequestError(f"A chat request with ID {request_id} is already running")
+        self._requests[request_id] = None
+
+    def release(self, request_id: str) -> None:
+        """Free a request id claimed by the caller."""
+        self._requests.pop(request_id, None)
+
+    def join(self, key: Optional[str]) -> Optional[Generation]:
+        """The in-flight run for a coalescing key, if any."""
+        if key is None:
+            return None
+        generation = self._runs.get(key)
+        if generation is None or generation.finished or not generation.subscribers:
+            return None
+        return generation
+
+    def start(
+        self,
+        key: Optional[str],
+        agent_id: int,
+        model: str,
+        run: Callable[[Generation], Awaitable[Any]],
+        admission: Any = None
+    ) -> Generation:
+        """Start a run; it holds admission (released when it ends)."""
+        generation = Generation(key or uuid.uuid4().hex, agent_id, model, admission)
+        generation.task = asyncio.create_task(self._run(generation, run))
+        self._runs[generation.key] = generation
+        self.started += 1
+        return generation
+
+    async def _run(self, generation: Generation, run: Callable[[Generation], Awaitable[Any]]) -> Any:
+        """Execute a run and record how long a complete one took."""
+        try:
+            result = await run(generation)
+        finally:
+            generation._close()
+            if generation.admission is not None:
+                generation.admission.release()
+            if self._runs.get(generation.key) is generation:
+                del self._runs[generation.key]
+        duration = time.perf_counter() - generation.started
+        mean = self._mean_duration.get(generation.model)
+        self._mean_duration[generation.model] = (
+            duration if mean is None
+            else mean + self.duration_smoothing * (duration - mean)
+        )
+        self.completed += 1
+        return result
+
+    def subscribe(self, generation: Generation, request_id: str) -> Subscription:
+        """Attach a claimed request to a run."""
+        if generation.subscribers:
+            self.coalesced += 1
+        subscription = Subscription(generation, request_id)
+        generation.subscribers[subscription.id] = subscription
+        self._requests[request_id] = subscription
+        return subscription
+
+    def get(self, request_id: str) -> Optional[Generation]:
+        """Return the running generation for a request id, if any."""
+        subscription = self._requests.get(request_id)
+        return subscription.generation if subscription is not None else None
+
+    def cancel(self, request_id: str, reason: str = "api") -> bool:
+        """Cancel a running request; False if there is none."""
+        subscription = self._requests.get(request_id)
+        if subscription is None or subscription.cancelled or subscription.generation.finished:
+            # Unknown, or not attached to a run yet (still admitting)
+            return False
+        subscription.cancel_reason = reason
+        subscription.queue.put_nowait(_CANCELLED)
+        self.cancelled[reason] = self.cancelled.get(reason, 0) + 1
+        return True
+
+    def leave(self, subscription: Subscription) -> None:
+        """Detach a request, cancelling the run if nobody else is following it."""
+        generation = subscription.generation
+        if not generation.finished and not subscription.cancelled:
+            # The consumer went away mid-run (client disconnect)
+            subscription.cancel_reason = "disconnect"
+            self.cancelled["disconnect"] = self.cancelled.get("disconnect", 0) + 1
+        generation.subscribers.pop(subscription.id, None)
+        if self._requests.get(subscription.request_id) is subscription:
+            # Still claimed until the caller releases it
+            self._requests[subscription.request_id] = None
+
+        if not generation.subscribers and not generation.task.done():
+            elapsed = time.perf_counter() - generation.started
+            self.aborted_runs += 1
+            self.cancelled_elapsed_seconds += elapsed
+            mean = self._mean_duration.get(generation.model)
+            if mean is not None:
+                self.estimated_saved_seconds += max(0.0, mean - elapsed)
+            generation.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return run counts, sharing and time saved by cancellation."""
+        return {
+            "active_runs": len(self._runs),
+            "active_requests": sum(1 for subscription in self._requests.values() if subscription is not None),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "cancelled": dict(self.cancelled),
+            "aborted_runs": self.aborted_runs,
+            "cancelled_elapsed_seconds": round(self.cancelled_elapsed_seconds, 3),
+            "estimated_saved_seconds": round(self.estimated_saved_seconds, 3),
+            "mean_duration_seconds": {model: round(value, 3) for model, value in self._mean_duration.items()},
+        }
+
+
+generation_registry = GenerationRegistry()
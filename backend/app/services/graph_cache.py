@@ -0,0 +1,103 @@
+"""Process-wide cache of compiled LangGraph workflows."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+
+
+def agent_fingerprint(agent: Any, tools: List[Any]) -> str:
+    """Compute a version fingerprint for an agent and its tool set."""
+    updated_at = getattr(agent, "updated_at", None)
+    payload = {
+        "system_prompt": agent.system_prompt,
+        "model": agent.model,
+        "temperature": str(agent.temperature),
+        "keep_alive": getattr(agent, "keep_alive", None),
+        "num_ctx": getattr(agent, "num_ctx", None),
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        "tools": sorted(
+            [
+                {
+                    "id": tool.id,
+                    "name": tool.name,
+                    "tool_type": tool.tool_type,
+                    "updated_at": tool.updated_at.isoformat() if getattr(tool, "updated_at", None) else None,
+                }
+                for tool in tools
+            ],
+            key=lambda t: t["id"],
+        ),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CompiledGraphCache:
+    """LRU cache of compiled graphs keyed by (agent_id, fingerprint)."""
+
+    def __init__(self, max_size: int = 128):
+        """Initialize an empty cache holding at most ``max_size`` graphs."""
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, agent_id: int, fingerprint: str, builder: Callable[[], Any]) -> Any:
+        """Return the cached graph for the key, building and storing it on a miss."""
+        key = (agent_id, fingerprint)
+        with self._lock:
+            graph = self._entries.get(key)
+            if graph is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return graph
+            self.misses += 1
+
+        # Build outside the lock; a concurrent builder for the same key just wins the race
+        graph = builder()
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            self._entries[key] = graph
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return graph
+
+    def invalidate_agent(self, agent_id: Optional[int]) -> int:
+        """Drop every cached graph for an agent. Returns the number removed."""
+        if agent_id is None:
+            return 0
+        with self._lock:
+            stale: List[Hashable] = [key for key in self._entries if key[0] == agent_id]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all cached graphs."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+graph_cache = CompiledGraphCache(max_size=settings.GRAPH_CACHE_MAX_SIZE)
@@ -1,147 +1,286 @@
 """LangGraph executor service with Ollama integration."""
-from typing import List, Dict, Any, Optional, AsyncIterator, Annotated, TypedDict
+import asyncio
+import time
+import uuid
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, AsyncIterator, Annotated, Tuple, TypedDict
 from langchain_ollama import ChatOllama
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from app.core.config import settings
 from app.models.database_models import Agent, Tool
-from sqlalchemy.orm import Session
+from app.services.context_manager import context_manager, summary_config
+from app.services.generation_registry import DuplicateRequestError, Generation, generation_registry
+from app.services.llm_scheduler import Admission, llm_scheduler
+from app.services.model_residency import model_residency
+from app.services.response_cache import conversation_key, response_cache
+from app.services.conversation_service import ConversationService
+from app.services.graph_cache import graph_cache, agent_fingerprint
+from app.services.tool_service import AsyncToolService
+from app.services.llm_registry import get_llm_registry
+from app.services.metrics import first_token_latency, ollama_timings, stream_total_latency
+from app.services.tool_executor import BoundTool, bind_agent_tools, execute_tool_calls
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SYSTEM_PROMPT_SUFFIX = "Based on the above instructions, answer the user's questions below."
+
+
+def canonical_system_prompt(system_prompt: str) -> str:
+    """The agent's system prompt in one byte-stable form.
+
+    Ollama reuses the evaluated prompt of a loaded model only up to the first
+    differing byte, so line endings and trailing whitespace are normalized and
+    the prompt is built once per agent version rather than on every call.
+    """
+    lines = [line.rstrip() for line in system_prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip() + "\n\n" + SYSTEM_PROMPT_SUFFIX
+
+
+class AgentState(TypedDict):
+    """State schema shared by all agent graphs."""
+    messages: Annotated[list[BaseMessage], add_messages]
+
+
+def _get_llm(
+    model: str,
+    temperature: float = 0.7,
+    keep_alive: Optional[str] = None,
+    num_ctx: Optional[int] = None
+) -> ChatOllama:
+    """Get the pooled Ollama LLM instance from the application registry."""
+    return get_llm_registry().get(model, temperature, settings.OLLAMA_BASE_URL, keep_alive, num_ctx)
+
+
+def build_agent_graph(agent: Agent, tools: List[Tool]):
+    """Build LangGraph agent workflow.
+
+    Compiled graphs are shared through the graph cache, so the nodes are
+    built from the agent's config values only and never hold an executor,
+    its session or any other per-request object.
+    """
+    # Create state graph
+    workflow = StateGraph(AgentState)
+    bound_tools = bind_agent_tools(tools)
+
+    # Add nodes
+    workflow.add_node("agent", _agent_node(agent, bound_tools))
+    workflow.add_node("tools", _tools_node(bound_tools))
+
+    # Define edges
+    workflow.set_entry_point("agent")
+    workflow.add_conditional_edges(
+        "agent",
+        _should_use_tools,
+        {
+            "tools": "tools",
+            "end": END
+        }
+    )
+    workflow.add_edge("tools", "agent")
+
+    return workflow.compile()
+
+
+def _agent_node(agent: Agent, tools: List[BoundTool]):
+    """Agent node that processes messages."""
+    # Capture plain config values so the compiled graph never touches the ORM
+    # instance (or its session) once it is shared through the graph cache.
+    model = agent.model
+    temperature = float(agent.temperature)
+    keep_alive = getattr(agent, "keep_alive", None)
+    num_ctx = context_manager.num_ctx_for(model, getattr(agent, "num_ctx", None))
+    # Built once per agent version so every call starts with the same bytes;
+    # tools are rendered into the prompt too, so their order is fixed as well
+    system_message = SystemMessage(content=canonical_system_prompt(agent.system_prompt))
+    tool_schemas = [tool.schema() for tool in sorted(tools, key=lambda tool: tool.name)]
+
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            llm = _get_llm(model, temperature, keep_alive, num_ctx)
+            if tool_schemas:
+                # Native Ollama tool calling: the model returns structured tool_calls
+                llm = llm.bind_tools(tool_schemas)
+
+            # Build messages: canonical system prompt + conversation
+            messages = state.get("messages", []) if isinstance(state, dict) else (state if isinstance(state, list) else [])
+
+            # Ensure all messages are proper BaseMessage objects
+            clean_messages = []
+            for msg in messages:
+                if isinstance(msg, dict):
+                    # Convert dict to proper message type
+                    role = msg.get("type", msg.get("role", "user"))
+                    content = msg.get("content", "")
+                    if role == "user" or role == "human":
+                        clean_messages.append(HumanMessage(content=content))
+                    elif role == "assistant" or role == "ai":
+                        clean_messages.append(AIMessage(content=content))
+                    elif role == "system":
+                        clean_messages.append(SystemMessage(content=content))
+                elif isinstance(msg, BaseMessage):
+                    clean_messages.append(msg)
+
+            # A client-supplied system message is replaced by the agent's own
+            if clean_messages and isinstance(clean_messages[0], SystemMessage):
+                clean_messages = clean_messages[1:]
+
+            # Keep the prompt within the model's budget, summarizing older turns
+            prompt_messages = await context_manager.fit(
+                model,
+                system_message,
+                clean_messages,
+                _summarizer(model, temperature, keep_alive, num_ctx),
+                num_ctx=num_ctx
+            )
+
+            # Invoke LLM
+            response = await llm.ainvoke(prompt_messages)
+
+            # Ensure response is a proper message object
+            if not isinstance(response, BaseMessage):
+                response = AIMessage(content=str(response))
+            else:
+                ollama_timings.record(
+                    model,
+                    response.response_metadata or {},
+                    sum(context_manager.count_tokens(message) for message in prompt_messages)
+                )
+
+            return {"messages": [response]}
+        except Exception as e:
+            # Return error message if LLM call fails
+            import traceback
+            error_content = f"I apologize, but I encountered an error: {str(e)}"
+            print(f"Agent node error: {error_content}\n{traceback.format_exc()}")
+            # Flagged so the failure is never cached as an answer
+            error_msg = AIMessage(content=error_content, response_metadata={"error": True})
+            return {"messages": [error_msg]}
+    return node
+
+
+def _summarizer(
+    model: str,
+    temperature: float,
+    keep_alive: Optional[str] = None,
+    num_ctx: Optional[int] = None
+):
+    """Summary callable for the context manager, hidden from token streaming."""
+    async def summarize(prompt: List[BaseMessage]) -> str:
+        llm = _get_llm(model, temperature, keep_alive, num_ctx)
+        options = {"temperature": 0, "num_predict": context_manager.summary_max_tokens, "num_ctx": llm.num_ctx}
+        response = await llm.ainvoke(
+            prompt,
+            config=summary_config(),
+            options={key: value for key, value in options.items() if value is not None}
+        )
+        return str(response.content)
+    return summarize
+
+
+def _tools_node(tools: List[BoundTool]):
+    """Tools node that executes the tool calls of the last model response."""
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        messages = state.get("messages", []) if isinstance(state, dict) else (state if isinstance(state, list) else [])
+        last_message = messages[-1] if messages else None
+        tool_calls = getattr(last_message, "tool_calls", None) or []
+        # Independent calls run concurrently, so a turn costs the slowest tool
+        tool_messages = await execute_tool_calls(tool_calls, tools)
+        return {"messages": tool_messages}
+    return node
+
+
+def _should_use_tools(state: Dict[str, Any]) -> str:
+    """Route to the tools node when the model asked for tool calls."""
+    messages = state.get("messages", []) if isinstance(state, dict) else (state if isinstance(state, list) else [])
+    last_message = messages[-1] if messages else None
+    if isinstance(last_message, AIMessage) and last_message.tool_calls:
+        return "tools"
+    return "end"
 
 
 class LangGraphExecutor:
     """Executor for running LangGraph agents with Ollama."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """Initialize the executor with database session."""
         self.db = db
-        self._llm_cache: Dict[str, ChatOllama] = {}
+        # Milliseconds until the first streamed token of the last execute() call
+        self.first_token_ms: Optional[float] = None
+        # Request id of the last execute() call, whether it was cancelled,
+        # answered from the response cache or joined an identical running request
+        self.request_id: Optional[str] = None
+        self.cancelled = False
+        self.cache_hit = False
+        self.coalesced = False
     
-    def _get_llm(self, model: str, temperature: float = 0.7) -> ChatOllama:
-        """Get or create Ollama LLM instance."""
-        cache_key = f"{model}_{temperature}"
-        if cache_key not in self._llm_cache:
-            self._llm_cache[cache_key] = ChatOllama(
-                model=model,
-                base_url=settings.OLLAMA_BASE_URL,
-                temperature=temperature
-            )
-        return self._llm_cache[cache_key]
-    
-    def _build_agent_graph(self, agent: Agent, tools: List[Tool]):
-        """Build LangGraph agent workflow."""
-        # Define state schema
-        class State(TypedDict):
-            messages: Annotated[list[BaseMessage], add_messages]
+    async def execute(
+        self,
+        agent: Agent,
+        messages: List[BaseMessage],
+        stream: bool = False,
+        conversation_id: Optional[int] = None,
+        request_id: Optional[str] = None,
+        client_id: Optional[str] = None,
+        admission: Optional[Admission] = None
+    ) -> AsyncIterator[str]:
+        """Execute agent with given messages.
         
-        # Create state graph
-        workflow = StateGraph(State)
+        With a conversation_id, messages are only the new turn: history is
+        loaded from the conversation store and the turn and reply are appended.
         
-        # Add nodes
-        workflow.add_node("agent", self._agent_node(agent, tools))
-        workflow.add_node("tools", self._tools_node(tools))
+        The run is registered under request_id (generated if omitted) and can
+        be cancelled through the generation registry. Closing this generator
+        early, e.g. when the client disconnects, cancels the run as well.
+        Raises DuplicateRequestError if a request with that id is still running.
         
-        # Define edges
-        workflow.set_entry_point("agent")
-        workflow.add_conditional_edges(
-            "agent",
-            self._should_use_tools,
-            {
-                "tools": "tools",
-                "end": END
-            }
-        )
-        workflow.add_edge("tools", "agent")
-        
-        return workflow.compile()
-    
-    def _agent_node(self, agent: Agent, tools: List[Tool]):
-        """Agent node that processes messages."""
-        async def node(state: Dict[str, Any]) -> Dict[str, Any]:
-            try:
-                llm = self._get_llm(agent.model, float(agent.temperature))
-                
-                # Build messages with system prompt
-                # Format: System prompt + separator instruction + user messages
-                messages = state.get("messages", []) if isinstance(state, dict) else (state if isinstance(state, list) else [])
-                
-                # Ensure all messages are proper BaseMessage objects
-                clean_messages = []
-                for msg in messages:
-                    if isinstance(msg, dict):
-                        # Convert dict to proper message type
-                        role = msg.get("type", msg.get("role", "user"))
-                        content = msg.get("content", "")
-                        if role == "user" or role == "human":
-                            clean_messages.append(HumanMessage(content=content))
-                        elif role == "assistant" or role == "ai":
-                            clean_messages.append(AIMessage(content=content))
-                        elif role == "system":
-                            clean_messages.append(SystemMessage(content=content))
-                    elif isinstance(msg, BaseMessage):
-                        clean_messages.append(msg)
-                
-                # Create enhanced system prompt with separator instruction
-                enhanced_system_prompt = f"""{agent.system_prompt}
-
-Based on the above instructions, answer the user's questions below."""
-                
-                # Ensure system message is first
-                if not clean_messages or not isinstance(clean_messages[0], SystemMessage):
-                    clean_messages = [SystemMessage(content=enhanced_system_prompt)] + clean_messages
-                else:
-                    # Replace existing system message with enhanced one
-                    clean_messages[0] = SystemMessage(content=enhanced_system_prompt)
-                
-                # Invoke LLM
-                response = await llm.ainvoke(clean_messages)
-                
-                # Ensure response is a proper message object
-                if not isinstance(response, BaseMessage):
-                    response = AIMessage(content=str(response))
-                
-                return {"messages": [response]}
-            except Exception as e:
-                # Return error message if LLM call fails
-                import traceback
-                error_content = f"I apologize, but I encountered an error: {str(e)}"
-                print(f"Agent node error: {error_content}\n{traceback.format_exc()}")
-                error_msg = AIMessage(content=error_content)
-                return {"messages": [error_msg]}
-        return node
+        The run holds a slot of the agent's model for its whole duration. It
+        queues for one fairly among clients (client_id, else the agent) and
+        raises AdmissionError when overloaded, unless the caller passes an
+        admission it already obtained from llm_scheduler.
+        """
+        self.request_id = request_id or uuid.uuid4().hex
+        try:
+            generation_registry.claim(self.request_id)
+        except DuplicateRequestError:
+            if admission is not None:
+                admission.release()
+            raise
+        try:
+            async with aclosing(
+                self._execute(agent, messages, stream, conversation_id, client_id, admission)
+            ) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            generation_registry.release(self.request_id)
     
-    def _tools_node(self, tools: List[Tool]):
-        """Tools node that executes tools."""
-        async def node(state: Dict[str, Any]) -> Dict[str, Any]:
-            # Placeholder for tool execution
-            # In a full implementation, this would execute the actual tools
-            messages = state.get("messages", []) if isinstance(state, dict) else (state if isinstance(state, list) else [])
-            # Ensure all are BaseMessage objects
-            clean_messages = []
-            for msg in messages:
-                if isinstance(msg, BaseMessage):
-                    clean_messages.append(msg)
-            return {"messages": clean_messages if clean_messages else messages}
-        return node
-    
-    def _should_use_tools(self, state: Dict[str, Any]) -> str:
-        """Determine if tools should be used."""
-        # Simple logic: for now, always go to end
-        # In full implementation, analyze LLM response for tool calls
-        return "end"
-    
-    async def execute(
+    async def _execute(
         self,
         agent: Agent,
         messages: List[BaseMessage],
-        stream: bool = False
+        stream: bool,
+        conversation_id: Optional[int],
+        client_id: Optional[str],
+        admission: Optional[Admission]
     ) -> AsyncIterator[str]:
-        """Execute agent with given messages."""
+        """Run a claimed request: cache, coalescing or a new model run."""
+        started = time.perf_counter()
+        self.first_token_ms = None
+        self.cancelled = False
+        self.cache_hit = False
+        self.coalesced = False
+        
         # Get tools for this agent
-        tools = self.db.query(Tool).filter(Tool.agent_id == agent.id).all()
+        tools = await AsyncToolService.get_tool_configs_by_agent(self.db, agent.id)
         
-        # Build graph
-        graph = self._build_agent_graph(agent, tools)
+        # Reuse the compiled graph unless the agent or its tools changed
+        fingerprint = agent_fingerprint(agent, tools)
+        graph = graph_cache.get_or_build(
+            agent.id,
+            fingerprint,
+            lambda: build_agent_graph(agent, tools)
+        )
         
         # Prepare initial state - ensure all are BaseMessage objects
         clean_messages = []
@@ -159,98 +298,197 @@ Based on the above instructions, answer the user's questions below."""
                 elif role == "system":
                     clean_messages.append(SystemMessage(content=content))
         
+        # The new turn is only stored once the request is answered from the
+        # cache or admitted, so a rejected (429/503) request leaves no trace
+        new_messages = clean_messages
+        if conversation_id is not None:
+            history = await ConversationService.get_history(self.db, conversation_id)
+            clean_messages = history + clean_messages
+        
         initial_state = {"messages": clean_messages}
         
-        if stream:
-            # Stream responses
-            try:
-                async for chunk in graph.astream(initial_state):
-                    # Handle different chunk formats
-                    if isinstance(chunk, dict):
-                        # Format: {"agent": {"messages": [...]}} or {"messages": [...]}
-                        if "agent" in chunk:
-                            agent_messages = chunk["agent"].get("messages", [])
-                        elif "messages" in chunk:
-                            agent_messages = chunk["messages"]
-                        else:
-                            agent_messages = []
-                    elif isinstance(chunk, list):
-                        # Direct list format
-                        agent_messages = chunk
-                    else:
-                        agent_messages = []
-                    
-                    for msg in agent_messages:
-                            # Handle both message objects and dicts
-                            if isinstance(msg, dict):
-                                content = msg.get("content", "")
-                            elif hasattr(msg, "content"):
-                                content = msg.content
-                            else:
-                                continue
-                            
-                            # If content is None or empty, skip
-                            if not content:
-                                continue
-                            
-                            # Convert to string if not already
-                            if not isinstance(content, str):
-                                content = str(content)
-                            
-                            # Yield content in smaller chunks if it's a long string
-                            if len(content) > 100:
-                                # Split into smaller chunks for streaming
-                                chunk_size = 50
-                                for i in range(0, len(content), chunk_size):
-                                    yield content[i:i + chunk_size]
-                            else:
-                                yield content
-            except Exception as e:
-                import traceback
-                error_str = f"Error: {str(e)}"
-                print(f"Streaming error: {error_str}\n{traceback.format_exc()}")
-                yield error_str
+        # A repeated question is answered from the response cache without a model run
+        cache_lookup = response_cache.lookup(
+            fingerprint, agent.model, float(agent.temperature), clean_messages, has_tools=bool(tools)
+        )
+        if cache_lookup is not None:
+            cached = await response_cache.get(cache_lookup)
+            if cached is not None:
+                if admission is not None:
+                    admission.release()
+                if conversation_id is not None:
+                    await ConversationService.append_messages(
+                        self.db, conversation_id, [*new_messages, AIMessage(content=cached)]
+                    )
+                self.first_token_ms = (time.perf_counter() - started) * 1000
+                self.cache_hit = True
+                yield cached
+                return
+        
+        # Identical requests already in flight share that run's output
+        coalesce_key = None
+        if settings.GENERATION_COALESCING and (float(agent.temperature) == 0 or settings.GENERATION_COALESCE_SAMPLED):
+            messages_key = (
+                cache_lookup.exact_key if cache_lookup is not None
+                else conversation_key(fingerprint, agent.model, float(agent.temperature), clean_messages)
+            )
+            coalesce_key = f"{messages_key}:{stream}"
+        
+        generation = generation_registry.join(coalesce_key)
+        if generation is not None:
+            if admission is not None:
+                admission.release()
+            self.coalesced = True
         else:
-            # Get final result
-            try:
-                result = await graph.ainvoke(initial_state)
-                # Handle different result formats
-                if isinstance(result, list):
-                    final_message = result[-1] if result else None
-                elif isinstance(result, dict):
-                    final_message = result.get("messages", [])[-1] if result.get("messages") else None
+            if admission is None:
+                admission = await llm_scheduler.admit(agent.model, client_id or f"agent:{agent.id}")
+            model_residency.record_use(agent.model)
+            # The graph runs in its own task so it can be cancelled from outside
+            # (cancel API, client disconnect) even while no token is flowing.
+            generation = generation_registry.start(
+                coalesce_key,
+                agent.id,
+                agent.model,
+                lambda run: self._produce(graph, initial_state, stream, run),
+                admission=admission
+            )
+        
+        subscription = generation_registry.subscribe(generation, self.request_id)
+        try:
+            if conversation_id is not None:
+                await ConversationService.append_messages(self.db, conversation_id, new_messages)
+            async for chunk in subscription:
+                if self.first_token_ms is None:
+                    self.first_token_ms = (time.perf_counter() - started) * 1000
+                    if stream:
+                        first_token_latency.record(self.first_token_ms)
+                yield chunk
+            if not subscription.cancelled:
+                await asyncio.wait([generation.task])
+            self.cancelled = subscription.cancelled or generation.task.cancelled()
+            if not self.cancelled:
+                answer, succeeded = generation.task.result()
+                if stream:
+                    stream_total_latency.record((time.perf_counter() - started) * 1000)
+                if conversation_id is not None and answer:
+                    await ConversationService.append_messages(self.db, conversation_id, [AIMessage(content=answer)])
+                if cache_lookup is not None and succeeded and not self.coalesced:
+                    await response_cache.put(cache_lookup, answer)
+        finally:
+            generation_registry.leave(subscription)
+    
+    async def _produce(
+        self,
+        graph: Any,
+        initial_state: Dict[str, Any],
+        stream: bool,
+        generation: Generation
+    ) -> Tuple[Optional[str], bool]:
+        """Run the graph, publishing output chunks to the generation.
+        
+        Returns the answer to keep in conversation history (None if there is
+        none) and whether the run succeeded, i.e. whether it may be cached.
+        """
+        if stream:
+            return await self._produce_stream(graph, initial_state, generation)
+        return await self._produce_result(graph, initial_state, generation)
+    
+    async def _produce_stream(
+        self,
+        graph: Any,
+        initial_state: Dict[str, Any],
+        generation: Generation
+    ) -> Tuple[Optional[str], bool]:
+        """Stream tokens as the model produces them.
+        
+        "messages" mode taps the chat model callbacks inside the agent node,
+        so the first token is forwarded before generation finishes.
+        """
+        response_parts = []
+        failed = False
+        try:
+            async for message, metadata in graph.astream(initial_state, stream_mode="messages"):
+                if metadata.get("langgraph_node") != "agent":
+                    continue
+                
+                content = message.content if hasattr(message, "content") else None
+                
+                # If content is None or empty, skip
+                if not content:
+                    continue
+                
+                if getattr(message, "response_metadata", {}).get("error"):
+                    failed = True
+                
+                # Convert to string if not already
+                if not isinstance(content, str):
+                    content = str(content)
+                
+                response_parts.append(content)
+                generation.publish(content)
+            answer = "".join(response_parts)
+            return answer or None, bool(answer) and not failed
+        except Exception as e:
+            import traceback
+            error_str = f"Error: {str(e)}"
+            print(f"Streaming error: {error_str}\n{traceback.format_exc()}")
+            generation.publish(error_str)
+            return None, False
+    
+    async def _produce_result(
+        self,
+        graph: Any,
+        initial_state: Dict[str, Any],
+        generation: Generation
+    ) -> Tuple[Optional[str], bool]:
+        """Run the graph to completion and publish the final answer."""
+        try:
+            result = await graph.ainvoke(initial_state)
+            # Handle different result formats
+            if isinstance(result, list):
+                final_message = result[-1] if result else None
+            elif isinstance(result, dict):
+                final_message = result.get("messages", [])[-1] if result.get("messages") else None
+            else:
+                final_message = None
+            
+            if final_message:
+                # Handle both message objects and dicts
+                if isinstance(final_message, dict):
+                    content = final_message.get("content", "")
+                elif hasattr(final_message, "content"):
+                    content = final_message.content
                 else:
-                    final_message = None
+                    content = str(final_message)
                 
-                if final_message:
-                    # Handle both message objects and dicts
-                    if isinstance(final_message, dict):
-                        content = final_message.get("content", "")
-                    elif hasattr(final_message, "content"):
-                        content = final_message.content
-                    else:
-                        content = str(final_message)
-                    
-                    if content:
-                        yield content if isinstance(content, str) else str(content)
-                    else:
-                        yield "No response generated"
+                if content:
+                    content = content if isinstance(content, str) else str(content)
+                    generation.publish(content)
+                    return content, not getattr(final_message, "response_metadata", {}).get("error")
                 else:
-                    yield "No response generated"
-            except Exception as e:
-                import traceback
-                error_str = f"Error: {str(e)}"
-                print(f"Execution error: {error_str}\n{traceback.format_exc()}")
-                yield error_str
+                    generation.publish("No response generated")
+            else:
+                generation.publish("No response generated")
+        except Exception as e:
+            import traceback
+            error_str = f"Error: {str(e)}"
+            print(f"Execution error: {error_str}\n{traceback.format_exc()}")
+            generation.publish(error_str)
+        return None, False
     
     async def execute_async(
         self,
         agent: Agent,
-        messages: List[BaseMessage]
+        messages: List[BaseMessage],
+        conversation_id: Optional[int] = None,
+        request_id: Optional[str] = None,
+        client_id: Optional[str] = None
     ) -> str:
         """Execute agent asynchronously and return full response."""
         response = ""
-        async for chunk in self.execute(agent, messages, stream=False):
+        async for chunk in self.execute(
+            agent, messages, stream=False, conversation_id=conversation_id, request_id=request_id, client_id=client_id
+        ):
             response += chunk
         return response
 
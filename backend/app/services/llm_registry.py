@@ -0,0 +1,208 @@
+"""Application-scoped registry of pooled Ollama chat clients."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+import httpx
+from langchain_ollama import ChatOllama
+from app.core.config import settings
+
+
+LLMKey = Tuple[str, float, str, Optional[Union[int, str]], Optional[int]]
+
+
+def ollama_keep_alive(value: Optional[str]) -> Optional[Union[int, str]]:
+    """Ollama keep_alive value: whole seconds as a number, durations as a string."""
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+class LLMClientRegistry:
+    """Holds one ChatOllama per (model, temperature, base_url, keep_alive, num_ctx).
+
+    Each client owns a keep-alive HTTP connection pool to Ollama, so reusing
+    clients across requests removes TCP/TLS setup from the chat hot path.
+    Ollama reloads a model whose num_ctx changes between requests, so each
+    configuration always sends the same options.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.OLLAMA_BASE_URL,
+        max_connections: int = settings.OLLAMA_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.OLLAMA_KEEPALIVE_EXPIRY,
+        request_timeout: Optional[float] = settings.OLLAMA_REQUEST_TIMEOUT,
+        idle_ttl: float = settings.LLM_CLIENT_IDLE_TTL,
+        max_clients: int = settings.LLM_CLIENT_MAX_CLIENTS,
+        keep_alive: Optional[str] = settings.OLLAMA_KEEP_ALIVE,
+        num_ctx: Optional[int] = settings.OLLAMA_NUM_CTX,
+    ):
+        """Initialize the registry with HTTP pool and eviction settings."""
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.request_timeout = request_timeout
+        self.idle_ttl = idle_ttl
+        self.max_clients = max_clients
+        self.keep_alive = ollama_keep_alive(keep_alive)
+        self.num_ctx = num_ctx
+        self._clients: "OrderedDict[LLMKey, ChatOllama]" = OrderedDict()
+        self._last_used: Dict[LLMKey, float] = {}
+        self._retired: List[ChatOllama] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        """Build httpx keyword arguments for a client's connection pool."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": self.request_timeout,
+        }
+
+    def get(
+        self,
+        model: str,
+        temperature: float = 0.7,
+        base_url: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+    ) -> ChatOllama:
+        """Get the pooled client for a model configuration, creating it on first use.
+
+        keep_alive and num_ctx fall back to the registry defaults when unset.
+        """
+        keep_alive_value = ollama_keep_alive(keep_alive)
+        key = (
+            model,
+            float(temperature),
+            base_url or self.base_url,
+            keep_alive_value if keep_alive_value is not None else self.keep_alive,
+            num_ctx or self.num_ctx,
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LLM client registry has been shut down")
+            llm = self._clients.get(key)
+            if llm is not None:
+                self._clients.move_to_end(key)
+                self.reused += 1
+            else:
+                llm = ChatOllama(
+                    model=key[0],
+                    base_url=key[2],
+                    temperature=key[1],
+                    keep_alive=key[3],
+                    num_ctx=key[4],
+                    client_kwargs=self._client_kwargs(),
+                )
+                self._clients[key] = llm
+                self.created += 1
+                # Over capacity: retire the least recently used client; it is
+                # closed on the next eviction pass rather than mid-request.
+                while len(self._clients) > self.max_clients:
+                    old_key, old_llm = self._clients.popitem(last=False)
+                    self._last_used.pop(old_key, None)
+                    self._retired.append(old_llm)
+                    self.evicted += 1
+            self._last_used[key] = time.monotonic()
+            return llm
+
+    async def evict_idle(self) -> int:
+        """Close clients unused for longer than the idle TTL. Returns the number closed."""
+        now = time.monotonic()
+        with self._lock:
+            idle_keys = [key for key, used in self._last_used.items() if now - used > self.idle_ttl]
+            to_close = self._retired
+            self._retired = []
+            for key in idle_keys:
+                to_close.append(self._clients.pop(key))
+                del self._last_used[key]
+                self.evicted += 1
+        for llm in to_close:
+            await _close_client(llm)
+        return len(to_close)
+
+    async def run_eviction_loop(self, interval: float = settings.LLM_CLIENT_EVICTION_INTERVAL) -> None:
+        """Periodically evict idle clients until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"LLM client eviction error: {e}")
+
+    async def aclose(self) -> None:
+        """Close every pooled client and refuse new lookups."""
+        with self._lock:
+            self._closed = True
+            to_close = list(self._clients.values()) + self._retired
+            self._clients.clear()
+            self._last_used.clear()
+            self._retired = []
+        for llm in to_close:
+            await _close_client(llm)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool usage counters."""
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "max_connections_per_client": self.max_connections,
+                "keep_alive": self.keep_alive,
+                "num_ctx": self.num_ctx,
+            }
+
+
+async def _close_client(llm: ChatOllama) -> None:
+    """Close the sync and async HTTP clients behind a ChatOllama instance."""
+    async_client = getattr(llm, "_async_client", None)
+    sync_client = getattr(llm, "_client", None)
+    try:
+        if async_client is not None:
+            await async_client.close()
+        if sync_client is not None:
+            sync_client.close()
+    except Exception as e:
+        print(f"Error closing Ollama client for {llm.model}: {e}")
+
+
+_registry: Optional[LLMClientRegistry] = None
+
+
+def init_llm_registry() -> LLMClientRegistry:
+    """Create the application-wide registry (called from the FastAPI lifespan)."""
+    global _registry
+    _registry = LLMClientRegistry()
+    return _registry
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the application-wide registry, creating it lazily outside the app lifespan."""
+    global _registry
+    if _registry is None:
+        _registry = LLMClientRegistry()
+    return _registry
+
+
+async def shutdown_llm_registry() -> None:
+    """Close all pooled clients and drop the application-wide registry."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
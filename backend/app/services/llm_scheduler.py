@@ -0,0 +1,216 @@
+"""Admission control in front of Ollama: per-model slots and fair queues."""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+from app.core.config import settings
+from app.services.metrics import LatencyStats
+
+
+def fairness_key(session_id: Optional[str], conversation_id: Optional[int], address: Optional[str]) -> str:
+    """Client id for fair queueing: the client's session, else its conversation, else its address.
+
+    Everyone behind one proxy, NAT or dev server shares an address, so the
+    address is only a fallback.
+    """
+    if session_id:
+        return f"session:{session_id}"
+    if conversation_id is not None:
+        return f"conversation:{conversation_id}"
+    return f"address:{address or 'unknown'}"
+
+
+class AdmissionError(Exception):
+    """A run was not admitted; carries the HTTP status and a Retry-After hint."""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        """Initialize with a message and seconds to wait before retrying."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """The model's wait queue is full."""
+    status_code = 429
+
+
+class QueueTimeoutError(AdmissionError):
+    """No slot became free within the queue time limit."""
+    status_code = 503
+
+
+class Admission:
+    """A model slot held by one run; release() hands it to the next waiter."""
+
+    def __init__(self, queue: "_ModelQueue"):
+        """Initialize a held slot."""
+        self._queue = queue
+        self._granted = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        """Give the slot back; safe to call more than once."""
+        if not self._released:
+            self._released = True
+            self._queue.release(time.perf_counter() - self._granted)
+
+
+class _ModelQueue:
+    """Slots and waiters for one model.
+
+    Waiters are grouped by client and served round-robin across clients, so
+    one client's burst cannot starve everyone else's requests.
+    """
+
+    def __init__(self, model: str, slots: int, max_queue: int):
+        """Initialize an idle queue."""
+        self.model = model
+        self.slots = max(1, slots)
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._mean_hold: Optional[float] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_time = LatencyStats()
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot."""
+        if self._mean_hold is None:
+            return 1
+        return max(1, math.ceil(self._mean_hold * (self.queued + 1) / self.slots))
+
+    async def acquire(self, client_id: str, timeout: float) -> Admission:
+        """Wait for a slot, at most timeout seconds."""
+        started = time.perf_counter()
+        if self.active < self.slots and self.queued == 0:
+            self.active += 1
+            return self._admit(started)
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Too many requests queued for model '{self.model}'", self.retry_after()
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client_id, deque()).append(waiter)
+        self.queued += 1
+        try:
+            # Shielded so a slot granted at the deadline is not lost with the waiter
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException as e:
+            if waiter.done():
+                # Granted just as we gave up: pass the slot on
+                self.release(None)
+            else:
+                waiter.cancel()
+                self._discard(client_id, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise QueueTimeoutError(
+                    f"Timed out after {timeout:g}s waiting for model '{self.model}'", self.retry_after()
+                )
+            raise
+        return self._admit(started)
+
+    def _admit(self, started: float) -> Admission:
+        """Record an admission."""
+        self.admitted += 1
+        self.wait_time.record((time.perf_counter() - started) * 1000)
+        return Admission(self)
+
+    def _discard(self, client_id: str, waiter: asyncio.Future) -> None:
+        """Remove a waiter that gave up."""
+        waiters = self._waiters.get(client_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[client_id]
+
+    def release(self, held: Optional[float]) -> None:
+        """Hand a slot to the next client in turn, or free it."""
+        if held is not None:
+            self._mean_hold = held if self._mean_hold is None else self._mean_hold + 0.2 * (held - self._mean_hold)
+        while self._waiters:
+            client_id, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self._waiters.move_to_end(client_id)
+            else:
+                del self._waiters[client_id]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slot usage, queue depth and wait times."""
+        return {
+            "slots": self.slots,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_clients": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait": self.wait_time.snapshot(),
+        }
+
+
+class LLMScheduler:
+    """Bounds concurrent runs per Ollama model.
+
+    Ollama serializes work beyond its parallel limit, so letting every
+    request through only makes all of them slow. Runs beyond a model's slots
+    wait in a bounded queue; a full queue is rejected straight away (429) and
+    a wait beyond the time limit fails (503), both with a Retry-After hint.
+    """
+
+    def __init__(
+        self,
+        default_slots: int = settings.SCHEDULER_MODEL_CONCURRENCY,
+        model_slots: Optional[Dict[str, int]] = None,
+        max_queue: int = settings.SCHEDULER_MAX_QUEUE,
+        queue_timeout: float = settings.SCHEDULER_QUEUE_TIMEOUT
+    ):
+        """Initialize limits."""
+        self.default_slots = default_slots
+        self.model_slots = dict(model_slots if model_slots is not None else settings.SCHEDULER_MODEL_CONCURRENCY_OVERRIDES)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._queues: Dict[str, _ModelQueue] = {}
+
+    def slots_for(self, model: str) -> int:
+        """Concurrent runs allowed for a model (exact name, then name without tag)."""
+        if model in self.model_slots:
+            return self.model_slots[model]
+        return self.model_slots.get(model.split(":")[0], self.default_slots)
+
+    def _queue(self, model: str) -> _ModelQueue:
+        """The queue for a model; "name" and "name:latest" share one."""
+        key = model if ":" in model else f"{model}:latest"
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _ModelQueue(key, self.slots_for(model), self.max_queue)
+        return queue
+
+    async def admit(self, model: str, client_id: str, timeout: Optional[float] = None) -> Admission:
+        """Wait for a slot on a model, raising AdmissionError when overloaded."""
+        return await self._queue(model).acquire(client_id, self.queue_timeout if timeout is None else timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-model slot and queue metrics."""
+        return {
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "models": {model: queue.stats() for model, queue in self._queues.items()},
+        }
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,135 @@
+"""In-process latency metrics for the chat pipeline."""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Mapping
+
+
+class LatencyStats:
+    """Rolling window of latency samples in milliseconds."""
+
+    def __init__(self, window: int = 1000):
+        """Initialize an empty window holding at most ``window`` samples."""
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, value_ms: float) -> None:
+        """Record one sample."""
+        with self._lock:
+            self._samples.append(value_ms)
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return count, mean and percentiles over the current window."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count, "mean_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "count": count,
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1], 2),
+        }
+
+
+class _ModelTimings:
+    """Accumulated Ollama timings of one model."""
+
+    def __init__(self):
+        """Initialize empty totals."""
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.prompt_eval_tokens = 0
+        self.eval_tokens = 0
+        self.prompt_eval_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.cold_loads = 0
+        self.prompt_eval = LatencyStats()
+        self.eval = LatencyStats()
+        self.load = LatencyStats()
+
+
+class OllamaTimingStats:
+    """Prompt evaluation vs generation timings that Ollama reports per call.
+
+    Ollama only evaluates the part of a prompt after the prefix it still has
+    cached for a loaded model, and reports just those tokens. Comparing that
+    with the estimated prompt size shows how much prefix evaluation was
+    skipped; a load time well above zero means the model had to be loaded.
+    """
+
+    # A load_duration above this means the model was (re)loaded for the call
+    COLD_LOAD_MS = 100.0
+
+    def __init__(self):
+        """Initialize with no models."""
+        self._models: Dict[str, _ModelTimings] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, metadata: Mapping[str, Any], prompt_tokens: int) -> None:
+        """Record the response_metadata of one chat call and its estimated prompt size."""
+        if "eval_duration" not in metadata and "prompt_eval_duration" not in metadata:
+            return
+        prompt_eval_ms = (metadata.get("prompt_eval_duration") or 0) / 1e6
+        eval_ms = (metadata.get("eval_duration") or 0) / 1e6
+        load_ms = (metadata.get("load_duration") or 0) / 1e6
+        with self._lock:
+            timings = self._models.get(model)
+            if timings is None:
+                timings = self._models[model] = _ModelTimings()
+            timings.requests += 1
+            timings.prompt_tokens += prompt_tokens
+            timings.prompt_eval_tokens += metadata.get("prompt_eval_count") or 0
+            timings.eval_tokens += metadata.get("eval_count") or 0
+            timings.prompt_eval_seconds += prompt_eval_ms / 1000
+            timings.eval_seconds += eval_ms / 1000
+            if load_ms > self.COLD_LOAD_MS:
+                timings.cold_loads += 1
+        timings.prompt_eval.record(prompt_eval_ms)
+        timings.eval.record(eval_ms)
+        timings.load.record(load_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return per-model token counts, durations and estimated prefix reuse."""
+        with self._lock:
+            models = list(self._models.items())
+        result = {}
+        for model, timings in models:
+            reused = max(0, timings.prompt_tokens - timings.prompt_eval_tokens)
+            result[model] = {
+                "requests": timings.requests,
+                "cold_loads": timings.cold_loads,
+                "estimated_prompt_tokens": timings.prompt_tokens,
+                "prompt_eval_tokens": timings.prompt_eval_tokens,
+                "estimated_reused_prompt_tokens": reused,
+                "estimated_prefix_reuse_rate": (reused / timings.prompt_tokens) if timings.prompt_tokens else 0.0,
+                "eval_tokens": timings.eval_tokens,
+                "prompt_eval_tokens_per_s": (
+                    round(timings.prompt_eval_tokens / timings.prompt_eval_seconds, 1)
+                    if timings.prompt_eval_seconds else None
+                ),
+                "eval_tokens_per_s": (
+                    round(timings.eval_tokens / timings.eval_seconds, 1) if timings.eval_seconds else None
+                ),
+                "prompt_eval": timings.prompt_eval.snapshot(),
+                "eval": timings.eval.snapshot(),
+                "load": timings.load.snapshot(),
+            }
+        return result
+
+
+# Time from execute() start to the first streamed token
+first_token_latency = LatencyStats()
+
+# Time from execute() start to the end of the streamed answer
+stream_total_latency = LatencyStats()
+
+# Ollama's prompt evaluation and generation timings per model
+ollama_timings = OllamaTimingStats()
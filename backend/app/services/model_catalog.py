@@ -0,0 +1,112 @@
+"""Cached list of the models Ollama has available."""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.http_client import get_http_client
+
+
+class ModelCatalog:
+    """Ollama's model list (/api/tags), served from memory.
+
+    Only the very first lookup waits for Ollama. Once the list is older than
+    the TTL it is still served as is while one background refresh fetches a
+    new one (stale-while-revalidate), and if Ollama is unreachable the last
+    known list keeps being served. Each list gets a version hash, so the API
+    can answer conditional requests with 304 Not Modified.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.MODEL_CATALOG_TTL,
+        fetch_timeout: float = settings.MODEL_CATALOG_FETCH_TIMEOUT
+    ):
+        """Initialize an empty catalog."""
+        self.ttl = ttl
+        self.fetch_timeout = fetch_timeout
+        self._models: Optional[List[Dict[str, Any]]] = None
+        self._version: Optional[str] = None
+        self._fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+
+    async def get(self) -> Tuple[List[Dict[str, Any]], str]:
+        """Return the model list and its version, fetching it only if there is none yet."""
+        if self._models is None:
+            await self._refresh_once()
+        elif time.monotonic() - self._fetched_at > self.ttl:
+            self.stale_hits += 1
+            self.refresh_in_background()
+        else:
+            self.hits += 1
+        return self._models, self._version
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh unless one is already running."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+
+    async def _refresh_once(self) -> None:
+        """Wait for the running refresh (starting one if needed); raises if it failed."""
+        self.refresh_in_background()
+        # Shielded so one caller going away does not cancel the refresh for the others
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self) -> None:
+        """Fetch the model list from Ollama."""
+        try:
+            response = await get_http_client().get(
+                f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=self.fetch_timeout
+            )
+            response.raise_for_status()
+            models = response.json().get("models", [])
+        except Exception as e:
+            self.refresh_errors += 1
+            self.last_error = str(e)
+            raise
+        encoded = json.dumps(models, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        self._models = models
+        self._version = hashlib.sha256(encoded).hexdigest()[:16]
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        self.last_error = None
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        """Report a failed background refresh (and mark its exception retrieved)."""
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Model catalog refresh failed: {task.exception()}")
+
+    async def stop(self) -> None:
+        """Cancel a running refresh."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return list size, age and refresh counters."""
+        return {
+            "models": len(self._models) if self._models is not None else None,
+            "version": self._version,
+            "age_seconds": round(time.monotonic() - self._fetched_at, 1) if self._models is not None else None,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "last_error": self.last_error,
+        }
+
+
+model_catalog = ModelCatalog()
@@ -0,0 +1,198 @@
+"""Keeps the Ollama models of active agents loaded, busiest first."""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_client import get_http_client
+from app.services.agent_service import AsyncAgentService
+from app.services.context_manager import context_manager
+from app.services.llm_registry import ollama_keep_alive
+
+
+def _model_key(model: str) -> str:
+    """Ollama's name for a model; "name" and "name:latest" are the same model."""
+    return model if ":" in model else f"{model}:latest"
+
+
+@dataclass
+class _WantedModel:
+    """A model used by active agents and the options to load it with."""
+    model: str
+    keep_alive: Optional[Union[int, str]]
+    num_ctx: Optional[int]
+    agents: int = 0
+
+
+class ModelResidencyManager:
+    """Preloads the models of active agents and keeps the busiest ones loaded.
+
+    The first request to a model Ollama has not loaded waits for the load,
+    often several seconds. A background task reads the active agents,
+    checks which models Ollama has loaded (/api/ps) and loads the missing
+    ones with an empty generate request. Only the max_models models with
+    the most recent traffic are kept loaded, so a rarely used agent cannot
+    push a busy model out of memory. Models are loaded with the agent's
+    keep_alive and num_ctx, since a request with a different num_ctx would
+    make Ollama load the model again.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.MODEL_RESIDENCY_ENABLED,
+        interval: float = settings.MODEL_RESIDENCY_INTERVAL,
+        max_models: int = settings.MODEL_RESIDENCY_MAX_MODELS,
+        traffic_half_life: float = settings.MODEL_RESIDENCY_TRAFFIC_HALF_LIFE,
+        load_timeout: float = settings.MODEL_RESIDENCY_LOAD_TIMEOUT,
+        session_factory=AsyncSessionLocal
+    ):
+        """Initialize the manager; call start() to begin managing residency."""
+        self.enabled = enabled
+        self.interval = interval
+        self.max_models = max_models
+        self.traffic_half_life = traffic_half_life
+        self.load_timeout = load_timeout
+        self._session_factory = session_factory
+        self._wanted: Dict[str, _WantedModel] = {}
+        self._resident: Set[str] = set()
+        # Model -> (traffic score, time it was last updated)
+        self._traffic: Dict[str, Tuple[float, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_error: Optional[str] = None
+        self.polls = 0
+        self.preloads = 0
+        self.preload_errors = 0
+        self.evictions_seen = 0
+
+    async def start(self) -> None:
+        """Start the background task; the first pass runs right away."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def record_use(self, model: str) -> None:
+        """Count a model run toward the model's recent traffic."""
+        key = _model_key(model)
+        now = time.monotonic()
+        self._traffic[key] = (self.traffic_score(key, now) + 1.0, now)
+
+    def traffic_score(self, model: str, now: Optional[float] = None) -> float:
+        """Model runs, each weighted down by its age (halving every traffic_half_life seconds)."""
+        score, updated = self._traffic.get(_model_key(model), (0.0, 0.0))
+        if not score:
+            return 0.0
+        elapsed = (time.monotonic() if now is None else now) - updated
+        return score * 0.5 ** (elapsed / self.traffic_half_life)
+
+    def priorities(self) -> List[_WantedModel]:
+        """Models of active agents, most recent traffic first, then most agents."""
+        return sorted(
+            self._wanted.values(),
+            key=lambda wanted: (self.traffic_score(wanted.model), wanted.agents),
+            reverse=True
+        )
+
+    async def _run(self) -> None:
+        """Refresh residency until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+                self._last_error = None
+            except Exception as e:
+                # Report once per distinct failure, e.g. while Ollama is down
+                if str(e) != self._last_error:
+                    print(f"Model residency error: {e}")
+                self._last_error = str(e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> None:
+        """Re-read active agents, poll loaded models and load the missing priority ones."""
+        await self.load_agents()
+        await self.poll()
+        for wanted in self.priorities()[:self.max_models]:
+            if wanted.model not in self._resident and await self.preload(wanted):
+                self._resident.add(wanted.model)
+
+    async def load_agents(self) -> None:
+        """Collect the distinct models of active agents."""
+        async with self._session_factory() as db:
+            agents = await AsyncAgentService.get_active_agents(db)
+        wanted: Dict[str, _WantedModel] = {}
+        for agent in sorted(agents, key=lambda agent: agent.id):
+            key = _model_key(agent.model)
+            if key not in wanted:
+                # The oldest agent's options win when agents share a model
+                keep_alive = ollama_keep_alive(agent.keep_alive)
+                wanted[key] = _WantedModel(
+                    model=key,
+                    keep_alive=keep_alive if keep_alive is not None else ollama_keep_alive(settings.OLLAMA_KEEP_ALIVE),
+                    num_ctx=context_manager.num_ctx_for(key, agent.num_ctx)
+                )
+            wanted[key].agents += 1
+        self._wanted = wanted
+
+    async def poll(self) -> Set[str]:
+        """Ask Ollama which models are loaded."""
+        response = await get_http_client().get(f"{settings.OLLAMA_BASE_URL}/api/ps")
+        response.raise_for_status()
+        resident = {_model_key(model.get("name", "")) for model in response.json().get("models", [])}
+        # Wanted models that were loaded last time but are gone now were evicted
+        self.evictions_seen += len((self._resident - resident) & self._wanted.keys())
+        self._resident = resident
+        self.polls += 1
+        return resident
+
+    async def preload(self, wanted: _WantedModel) -> bool:
+        """Load a model with an empty generate request; False if it failed."""
+        payload: Dict[str, Any] = {"model": wanted.model, "prompt": "", "stream": False}
+        if wanted.keep_alive is not None:
+            payload["keep_alive"] = wanted.keep_alive
+        if wanted.num_ctx:
+            payload["options"] = {"num_ctx": wanted.num_ctx}
+        try:
+            response = await get_http_client().post(
+                f"{settings.OLLAMA_BASE_URL}/api/generate", json=payload, timeout=self.load_timeout
+            )
+            response.raise_for_status()
+        except Exception as e:
+            self.preload_errors += 1
+            print(f"Failed to preload model {wanted.model}: {e}")
+            return False
+        self.preloads += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return loaded models, residency priorities and counters."""
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "max_models": self.max_models,
+            "resident": sorted(self._resident),
+            "priorities": [
+                {
+                    "model": wanted.model,
+                    "agents": wanted.agents,
+                    "traffic": round(self.traffic_score(wanted.model, now), 3),
+                    "resident": wanted.model in self._resident,
+                }
+                for wanted in self.priorities()
+            ],
+            "polls": self.polls,
+            "preloads": self.preloads,
+            "preload_errors": self.preload_errors,
+            "evictions_seen": self.evictions_seen,
+            "last_error": self._last_error,
+        }
+
+
+model_residency = ModelResidencyManager()
@@ -0,0 +1,214 @@
+"""Pluggable OCR backends and the policy that routes documents between them."""
+import asyncio
+import io
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+import pdfplumber
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.database_models import OCRJob
+from app.services.databricks_service import DatabricksError, get_databricks_client
+from app.services.ocr_job_service import ocr_job_manager
+from app.tools.builtin.registry import create_builtin_tool_instance
+
+
+class OCRBackendUnavailableError(Exception):
+    """No configured backend may process a document."""
+
+
+@dataclass
+class OCRDocument:
+    """An uploaded PDF plus what is known about it before routing."""
+    filename: str
+    file: UploadFile
+    size: Optional[int] = None
+    page_count: Optional[int] = None
+    content: Optional[bytes] = None  # Set when the upload was already read for inspection
+
+    async def read(self) -> bytes:
+        """Return the whole upload, reading it only once."""
+        if self.content is None:
+            await self.file.seek(0)
+            self.content = await self.file.read()
+        return self.content
+
+    async def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield the upload in fixed-size chunks from the start."""
+        if self.content is not None:
+            for start in range(0, len(self.content), chunk_size):
+                yield self.content[start:start + chunk_size]
+            return
+        await self.file.seek(0)
+        while True:
+            chunk = await self.file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class OCRBackend(ABC):
+    """Interface for services that turn an uploaded PDF into an OCR job."""
+
+    name: str = ""
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Whether the backend is configured and can accept documents."""
+
+    @abstractmethod
+    async def submit(self, db: AsyncSession, document: OCRDocument) -> OCRJob:
+        """Process or queue a document and return its job record."""
+
+    def shutdown(self) -> None:
+        """Release resources held by the backend."""
+
+
+class DatabricksOCRBackend(OCRBackend):
+    """Uploads to a Databricks volume and runs the OCR notebook as a job."""
+
+    name = "databricks"
+
+    def is_available(self) -> bool:
+        """Whether Databricks credentials and paths are configured."""
+        return bool(
+            settings.DATABRICKS_URL and settings.DATABRICKS_TOKEN
+            and settings.DATABRICKS_NOTEBOOK_PATH and settings.DATABRICKS_VOLUME_PATH
+        )
+
+    async def submit(self, db: AsyncSession, document: OCRDocument) -> OCRJob:
+        """Stream the file into the volume and queue the notebook run."""
+        client = get_databricks_client()
+        volume_file = await client.upload_file(
+            settings.DATABRICKS_VOLUME_PATH,
+            document.filename,
+            document.iter_chunks(settings.DATABRICKS_UPLOAD_CHUNK_SIZE),
+            size=document.size
+        )
+        job = await ocr_job_manager.enqueue(db, document.filename, volume_file)
+        if job.status == "failed":
+            raise DatabricksError(job.state_message or "Failed to trigger Databricks job")
+        return job
+
+
+class LocalOCRBackend(OCRBackend):
+    """Runs PDFToJSONTool in-process on a small worker pool and returns at once."""
+
+    name = "local"
+
+    def __init__(self, max_workers: int = settings.OCR_LOCAL_WORKERS):
+        """Initialize the backend; the pool is created on first use."""
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Pool that bounds how many documents are processed at once."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="local-ocr")
+        return self._executor
+
+    def is_available(self) -> bool:
+        """The local backend needs no configuration."""
+        return True
+
+    async def submit(self, db: AsyncSession, document: OCRDocument) -> OCRJob:
+        """Extract the document now and record a finished job."""
+        file_bytes = await document.read()
+        job = OCRJob(filename=document.filename, backend=self.name, status="running")
+        db.add(job)
+        await db.commit()
+
+        try:
+            pages = await asyncio.get_running_loop().run_in_executor(self.executor, _run_pdf_to_json, file_bytes)
+            job.result = {"pdf_to_json": pages}
+            job.status = "succeeded"
+        except Exception as e:
+            job.status = "failed"
+            job.state_message = str(e)
+        job.completed_at = datetime.now(timezone.utc)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _run_pdf_to_json(file_bytes: bytes) -> list:
+    """Run the shared PDF to JSON tool over a document."""
+    tool = create_builtin_tool_instance("pdf_to_json")
+    return list(tool.iter_pages(file_bytes))
+
+
+def count_pdf_pages(file_bytes: bytes) -> int:
+    """Return the number of pages in a PDF."""
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        return len(pdf.pages)
+
+
+ocr_backends: Dict[str, OCRBackend] = {
+    DatabricksOCRBackend.name: DatabricksOCRBackend(),
+    LocalOCRBackend.name: LocalOCRBackend(),
+}
+
+
+async def inspect_upload(file: UploadFile) -> OCRDocument:
+    """Describe an upload, counting pages when it is small enough to be routed locally."""
+    document = OCRDocument(filename=os.path.basename(file.filename), file=file, size=file.size)
+    if document.size is not None and document.size <= settings.OCR_LOCAL_MAX_BYTES:
+        file_bytes = await document.read()
+        try:
+            document.page_count = await asyncio.get_running_loop().run_in_executor(None, count_pdf_pages, file_bytes)
+        except Exception:
+            document.page_count = None  # Unreadable here; let the remote backend decide
+    return document
+
+
+def choose_ocr_backend(document: OCRDocument, requested: Optional[str] = None) -> OCRBackend:
+    """Pick a backend: an explicit choice, else local for small documents, else Databricks.
+
+    Raises:
+        ValueError: If the requested backend is unknown or not configured.
+        OCRBackendUnavailableError: If the document is over the local limits
+            and Databricks is not configured.
+    """
+    name = requested or settings.OCR_BACKEND
+    if name != "auto":
+        backend = ocr_backends.get(name)
+        if backend is None:
+            raise ValueError(f"Unknown OCR backend '{name}'")
+        if not backend.is_available():
+            raise ValueError(f"OCR backend '{name}' is not configured")
+        return backend
+
+    remote = ocr_backends[DatabricksOCRBackend.name]
+    is_small = (
+        document.page_count is not None
+        and document.page_count <= settings.OCR_LOCAL_MAX_PAGES
+        and document.size is not None
+        and document.size <= settings.OCR_LOCAL_MAX_BYTES
+    )
+    if is_small:
+        return ocr_backends[LocalOCRBackend.name]
+    if not remote.is_available():
+        # Never run a large document synchronously inside the request
+        raise OCRBackendUnavailableError(
+            "Databricks configuration is missing, and documents over "
+            f"{settings.OCR_LOCAL_MAX_PAGES} pages or {settings.OCR_LOCAL_MAX_BYTES} bytes "
+            "are not processed locally"
+        )
+    return remote
+
+
+def shutdown_ocr_backends() -> None:
+    """Release resources held by every backend."""
+    for backend in ocr_backends.values():
+        backend.shutdown()
@@ -0,0 +1,235 @@
+"""OCR job tracking and background polling of Databricks runs."""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database_models import OCRJob
+from app.services.databricks_service import DatabricksClient, DatabricksError, get_databricks_client
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+IN_FLIGHT_STATUSES = ("submitted", "running")
+
+# Databricks life_cycle_state values for runs that have started executing
+_RUNNING_STATES = ("RUNNING", "TERMINATING")
+_FINISHED_STATES = ("TERMINATED", "SKIPPED", "INTERNAL_ERROR")
+
+
+class OCRJobService:
+    """Service class for OCR job records."""
+
+    @staticmethod
+    async def create_job(db: AsyncSession, filename: str, volume_path: Optional[str] = None) -> OCRJob:
+        """Create a queued OCR job."""
+        db_job = OCRJob(filename=filename, volume_path=volume_path, backend="databricks", status="queued")
+        db.add(db_job)
+        await db.commit()
+        await db.refresh(db_job)
+        return db_job
+
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: int) -> Optional[OCRJob]:
+        """Get OCR job by ID."""
+        result = await db.execute(select(OCRJob).where(OCRJob.id == job_id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_jobs(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[OCRJob]:
+        """Get OCR jobs, newest first."""
+        result = await db.execute(select(OCRJob).order_by(OCRJob.id.desc()).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_jobs_by_status(db: AsyncSession, statuses: Tuple[str, ...], limit: Optional[int] = None) -> List[OCRJob]:
+        """Get OCR jobs in the given statuses, oldest first."""
+        query = select(OCRJob).where(OCRJob.status.in_(statuses)).order_by(OCRJob.id)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+
+class OCRJobManager:
+    """Submits queued OCR jobs within a concurrency limit and polls their runs.
+
+    One background task checks every due run per tick (concurrently, with
+    exponential backoff per run), so clients only read job state from the DB.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.OCR_MAX_IN_FLIGHT_RUNS,
+        initial_interval: float = settings.OCR_POLL_INITIAL_INTERVAL,
+        max_interval: float = settings.OCR_POLL_MAX_INTERVAL,
+        poll_concurrency: int = settings.OCR_POLL_CONCURRENCY,
+        client_factory: Callable[[], DatabricksClient] = get_databricks_client,
+        session_factory=AsyncSessionLocal
+    ):
+        """Initialize the manager; call start() to begin polling."""
+        self.max_in_flight = max_in_flight
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.poll_concurrency = poll_concurrency
+        self._client_factory = client_factory
+        self._session_factory = session_factory
+        # job_id -> (next poll time, current interval) for submitted/running jobs
+        self._schedule: Dict[int, Tuple[float, float]] = {}
+        self._dispatch_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of submitted runs that have not finished."""
+        return len(self._schedule)
+
+    def stats(self) -> Dict[str, int]:
+        """Return in-flight and poll counters."""
+        return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "polls": self.polls}
+
+    async def start(self) -> None:
+        """Resume tracking in-flight jobs from the DB and start the poller."""
+        async with self._session_factory() as db:
+            for job in await OCRJobService.get_jobs_by_status(db, IN_FLIGHT_STATUSES):
+                self._schedule[job.id] = (time.monotonic(), self.initial_interval)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the poller."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def enqueue(self, db: AsyncSession, filename: str, volume_path: str) -> OCRJob:
+        """Record a job for an uploaded file and submit it right away if a slot is free."""
+        job = await OCRJobService.create_job(db, filename, volume_path)
+        await self.submit_queued(db)
+        return job
+
+    async def submit_queued(self, db: AsyncSession) -> int:
+        """Submit queued jobs, oldest first, while in-flight slots are free."""
+        async with self._dispatch_lock:
+            free = self.max_in_flight - self.in_flight
+            if free <= 0:
+                return 0
+            jobs = await OCRJobService.get_jobs_by_status(db, ("queued",), limit=free)
+            if not jobs:
+                return 0
+
+            client = self._client_factory()
+            for job in jobs:
+                try:
+                    run = await client.submit_notebook_run(
+                        run_name=f"OCR_{job.filename}",
+                        notebook_path=settings.DATABRICKS_NOTEBOOK_PATH,
+                        base_parameters={"pdf_path": job.volume_path}
+                    )
+                    job.run_id = str(run["run_id"])
+                    job.status = "submitted"
+                    self._schedule[job.id] = (time.monotonic() + self.initial_interval, self.initial_interval)
+                except (DatabricksError, KeyError) as e:
+                    job.status = "failed"
+                    job.state_message = str(e)
+                    job.completed_at = datetime.now(timezone.utc)
+            await db.commit()
+        self._wakeup.set()
+        return len(jobs)
+
+    async def poll_due(self, db: AsyncSession) -> int:
+        """Check the state of every run whose poll time has come."""
+        now = time.monotonic()
+        due = [job_id for job_id, (next_poll, _) in self._schedule.items() if next_poll <= now]
+        if not due:
+            return 0
+
+        result = await db.execute(select(OCRJob).where(OCRJob.id.in_(due)))
+        jobs = list(result.scalars().all())
+        client = self._client_factory()
+        semaphore = asyncio.Semaphore(self.poll_concurrency)
+
+        async def check(job: OCRJob):
+            async with semaphore:
+                await self._check_job(client, job)
+
+        # One job's failure must not discard the other jobs' updates
+        results = await asyncio.gather(*(check(job) for job in jobs), return_exceptions=True)
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"OCR job {job.id} poll error: {result}")
+                self._backoff(job.id)
+        await db.commit()
+        self.polls += len(jobs)
+        return len(jobs)
+
+    async def _check_job(self, client: DatabricksClient, job: OCRJob) -> None:
+        """Update one job from its run state, fetching output once it succeeds."""
+        try:
+            run = await client.get_run(job.run_id)
+            state = run.get("state", {})
+            life_cycle_state = state.get("life_cycle_state")
+            job.state_message = state.get("state_message") or None
+
+            if life_cycle_state not in _FINISHED_STATES:
+                if life_cycle_state in _RUNNING_STATES:
+                    job.status = "running"
+                self._backoff(job.id)
+                return
+
+            if life_cycle_state == "TERMINATED" and state.get("result_state") == "SUCCESS":
+                outputs = {}
+                for task in run.get("tasks", []):
+                    output = await client.get_run_output(str(task["run_id"]))
+                    outputs[task.get("task_key", str(task["run_id"]))] = output.get("notebook_output", {})
+                job.result = outputs
+                job.status = "succeeded"
+            else:
+                job.status = "failed"
+                job.state_message = job.state_message or state.get("result_state") or life_cycle_state
+            job.completed_at = datetime.now(timezone.utc)
+            self._schedule.pop(job.id, None)
+        except DatabricksError as e:
+            job.state_message = str(e)
+            self._backoff(job.id)
+
+    def _backoff(self, job_id: int) -> None:
+        """Schedule the next poll of a job, doubling its interval up to the maximum."""
+        _, interval = self._schedule.get(job_id, (0.0, self.initial_interval))
+        interval = min(interval * 2, self.max_interval)
+        self._schedule[job_id] = (time.monotonic() + interval, interval)
+
+    async def _run(self) -> None:
+        """Poll due runs and fill free slots until cancelled."""
+        while True:
+            self._wakeup.clear()
+            failed = False
+            try:
+                async with self._session_factory() as db:
+                    await self.poll_due(db)
+                    await self.submit_queued(db)
+                    self._wakeup.clear()
+            except Exception as e:
+                failed = True
+                print(f"OCR job poller error: {e}")
+
+            if self._schedule:
+                delay = max(0.0, min(next_poll for next_poll, _ in self._schedule.values()) - time.monotonic())
+            else:
+                delay = self.max_interval
+            if failed:
+                # Due jobs were not rescheduled; wait instead of retrying in a tight loop
+                delay = max(delay, self.initial_interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+ocr_job_manager = OCRJobManager()
@@ -0,0 +1,231 @@
+"""Cache of agent answers: exact matches plus an optional semantic tier."""
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.services.config_cache import TTLCache
+
+
+def normalize_messages(messages: Sequence[BaseMessage]) -> List[List[str]]:
+    """Message list as [type, content] pairs with whitespace collapsed."""
+    return [[message.type, " ".join(str(message.content).split())] for message in messages]
+
+
+def _digest(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts."""
+    encoded = json.dumps(parts, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def conversation_key(fingerprint: str, model: str, temperature: float, messages: Sequence[BaseMessage]) -> str:
+    """Key of a request: agent version, model settings and normalized conversation."""
+    return _digest(fingerprint, model, temperature, normalize_messages(messages))
+
+
+@dataclass
+class ResponseLookup:
+    """Cache keys for one request.
+
+    The exact key covers the whole normalized conversation. Semantic matches
+    are only looked for among requests with the same partition (agent, model,
+    temperature and every message before the last) and compare the final
+    user message by embedding.
+    """
+    exact_key: str
+    partition_key: str
+    query: Optional[str]
+    vector: Optional[np.ndarray] = None
+
+
+class _SemanticIndex:
+    """Unit-normalized embeddings of one partition's questions, oldest first."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.keys: List[str] = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+
+    def add(self, key: str, vector: np.ndarray) -> int:
+        """Index a question's vector under its exact key; returns the change in size."""
+        if key in self.keys:
+            return 0
+        dropped = 0
+        if self.vectors.shape[1] not in (0, vector.shape[0]):
+            # The embedding model changed: start over
+            dropped = len(self.keys)
+            self.keys, self.vectors = [], np.empty((0, 0), dtype=np.float32)
+        self.keys.append(key)
+        self.vectors = np.vstack([self.vectors.reshape(-1, vector.shape[0]), vector[None, :]])
+        return 1 - dropped
+
+    def pop_oldest(self) -> None:
+        """Drop the oldest question."""
+        self.keys = self.keys[1:]
+        self.vectors = self.vectors[1:]
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[float, str]]:
+        """(similarity, key) of the closest indexed question."""
+        if not self.keys or self.vectors.shape[1] != vector.shape[0]:
+            return None
+        similarities = self.vectors @ vector
+        best = int(np.argmax(similarities))
+        return float(similarities[best]), self.keys[best]
+
+    def remove(self, key: str) -> None:
+        """Drop a question whose cached answer expired."""
+        if key in self.keys:
+            index = self.keys.index(key)
+            del self.keys[index]
+            self.vectors = np.delete(self.vectors, index, axis=0)
+
+
+class ResponseCache:
+    """Answers repeated questions without a model run.
+
+    Only deterministic agents are cached unless sampled answers are opted
+    in, and agents with tools are never cached since their answers can
+    depend on data outside the conversation. With the semantic tier on, a
+    miss on the exact key embeds the last user message through Ollama and
+    reuses the answer of the most similar cached question above the
+    similarity threshold.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.RESPONSE_CACHE_TTL,
+        max_size: int = settings.RESPONSE_CACHE_MAX_SIZE,
+        enabled: bool = settings.RESPONSE_CACHE_ENABLED,
+        cache_sampled: bool = settings.RESPONSE_CACHE_SAMPLED,
+        semantic: bool = settings.RESPONSE_CACHE_SEMANTIC,
+        embedding_model: str = settings.RESPONSE_CACHE_EMBEDDING_MODEL,
+        similarity_threshold: float = settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD
+    ):
+        """Initialize the exact cache and the semantic index."""
+        self.enabled = enabled
+        self.cache_sampled = cache_sampled
+        self.semantic = semantic
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self.max_size = max_size
+        self._answers: TTLCache[str] = TTLCache(ttl, max_size)
+        # Partitions in least recently used order; at most max_size questions overall
+        self._indexes: "OrderedDict[str, _SemanticIndex]" = OrderedDict()
+        self._indexed = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stored = 0
+        self.semantic_evictions = 0
+        self.embedding_errors = 0
+
+    def lookup(
+        self,
+        fingerprint: str,
+        model: str,
+        temperature: float,
+        messages: Sequence[BaseMessage],
+        has_tools: bool = False
+    ) -> Optional[ResponseLookup]:
+        """Keys for a request, or None if it must not be cached."""
+        if not self.enabled or not messages or has_tools or (temperature > 0 and not self.cache_sampled):
+            self.bypassed += 1
+            return None
+        normalized = normalize_messages(messages)
+        return ResponseLookup(
+            exact_key=_digest(fingerprint, model, temperature, normalized),
+            partition_key=_digest(fingerprint, model, temperature, normalized[:-1]),
+            query=normalized[-1][1] if isinstance(messages[-1], HumanMessage) else None
+        )
+
+    async def get(self, lookup: ResponseLookup) -> Optional[str]:
+        """Cached answer for a request, exact match first."""
+        found, answer = self._answers.get(lookup.exact_key)
+        if found:
+            self.exact_hits += 1
+            return answer
+
+        if self.semantic and lookup.query:
+            lookup.vector = await self._embed(lookup.query)
+            index = self._indexes.get(lookup.partition_key)
+            match = index.nearest(lookup.vector) if index is not None and lookup.vector is not None else None
+            if match is not None and match[0] >= self.similarity_threshold:
+                found, answer = self._answers.get(match[1])
+                if found:
+                    self.semantic_hits += 1
+                    return answer
+                index.remove(match[1])
+                self._indexed -= 1
+                self.semantic_evictions += 1
+        self.misses += 1
+        return None
+
+    async def put(self, lookup: ResponseLookup, answer: str) -> None:
+        """Store a fresh answer."""
+        self._answers.set(lookup.exact_key, answer)
+        self.stored += 1
+        if not self.semantic or not lookup.query:
+            return
+        if lookup.vector is None:
+            lookup.vector = await self._embed(lookup.query)
+            if lookup.vector is None:
+                return
+        index = self._indexes.get(lookup.partition_key)
+        if index is None:
+            index = self._indexes[lookup.partition_key] = _SemanticIndex()
+        self._indexes.move_to_end(lookup.partition_key)
+        self._indexed += index.add(lookup.exact_key, lookup.vector)
+        while self._indexed > self.max_size:
+            oldest_key, oldest = next(iter(self._indexes.items()))
+            oldest.pop_oldest()
+            self._indexed -= 1
+            if not oldest.keys:
+                del self._indexes[oldest_key]
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of a text from Ollama, or None on failure."""
+        try:
+            response = await get_http_client().post(
+                f"{settings.OLLAMA_BASE_URL}/api/embed",
+                json={"model": self.embedding_model, "input": text}
+            )
+            response.raise_for_status()
+            vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        except Exception as e:
+            self.embedding_errors += 1
+            print(f"Response cache embedding failed: {e}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        self._answers.clear()
+        self._indexes.clear()
+        self._indexed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rates per tier and cache sizes."""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "semantic": self.semantic,
+            "answers": self._answers.stats(),
+            "indexed_questions": self._indexed,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stored": self.stored,
+            "semantic_evictions": self.semantic_evictions,
+            "embedding_errors": self.embedding_errors,
+            "hit_rate": ((self.exact_hits + self.semantic_hits) / lookups) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
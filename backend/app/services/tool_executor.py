@@ -0,0 +1,147 @@
+"""Execution of agent tool calls against builtin tool implementations."""
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import ToolMessage
+from app.core.config import settings
+from app.services.config_cache import ToolSnapshot
+from app.services.tool_result_cache import tool_cache_key, tool_result_cache
+from app.tools.builtin.registry import (
+    BUILTIN_TOOL_REGISTRY,
+    create_builtin_tool_instance,
+    resolve_builtin_tool_name
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BoundTool:
+    """An agent tool offered to the model, resolved to its implementation."""
+    name: str
+    builtin_name: str
+    description: str
+    parameters_json: str
+    timeout: float
+    version: str = "1"
+    cacheable: bool = False
+    cache_ttl: Optional[float] = None
+    file_arguments: Tuple[str, ...] = ()
+
+    def schema(self) -> Dict[str, Any]:
+        """OpenAI-style function schema for bind_tools."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": json.loads(self.parameters_json),
+            },
+        }
+
+
+def bind_agent_tools(tools: Sequence[ToolSnapshot]) -> List[BoundTool]:
+    """Resolve an agent's tools to executable builtin implementations.
+
+    Tools without an implementation in the builtin registry are skipped, since
+    the model could call them but nothing could run them.
+    """
+    bound: Dict[str, BoundTool] = {}
+    for tool in tools:
+        if tool.tool_type != "builtin":
+            continue
+        builtin_name = resolve_builtin_tool_name(tool.implementation, tool.name)
+        if builtin_name is None:
+            logger.warning("Skipping tool %r: no builtin implementation", tool.name)
+            continue
+        tool_def = BUILTIN_TOOL_REGISTRY[builtin_name]
+        parameters = tool.parameters or tool_def.get("parameters") or {"type": "object", "properties": {}}
+        bound[builtin_name] = BoundTool(
+            name=builtin_name,
+            builtin_name=builtin_name,
+            description=tool.description or tool_def["description"],
+            parameters_json=json.dumps(parameters),
+            timeout=float(tool_def.get("timeout", settings.TOOL_DEFAULT_TIMEOUT)),
+            version=str(tool_def.get("version", "1")),
+            cacheable=bool(tool_def.get("cacheable", False)),
+            cache_ttl=tool_def.get("cache_ttl"),
+            file_arguments=tuple(tool_def.get("file_arguments", ())),
+        )
+    return list(bound.values())
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Worker pool for tool invocations, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.TOOL_EXECUTOR_WORKERS, thread_name_prefix="agent-tool")
+    return _executor
+
+
+def shutdown_tool_executor() -> None:
+    """Stop the tool worker pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _invoke_builtin(builtin_name: str, arguments: Dict[str, Any]) -> Any:
+    """Call a builtin tool's invoke() with tool-call arguments."""
+    return create_builtin_tool_instance(builtin_name).invoke(arguments)
+
+
+async def _run_tool(tool: BoundTool, arguments: Dict[str, Any]) -> str:
+    """Run one tool in the worker pool, so blocking tools never stall the event loop.
+
+    An async invoke() only creates its coroutine in the worker; it is awaited here.
+    """
+    result = await asyncio.get_running_loop().run_in_executor(
+        _get_executor(), _invoke_builtin, tool.builtin_name, arguments
+    )
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+
+async def execute_tool_call(call: Dict[str, Any], tools_by_name: Dict[str, BoundTool]) -> ToolMessage:
+    """Execute a single tool call and wrap the outcome (or error) in a ToolMessage.
+
+    A timed-out call is reported to the model straight away; a worker thread
+    already running it cannot be interrupted and finishes in the background.
+    """
+    name = call.get("name", "")
+    tool = tools_by_name.get(name)
+    if tool is None:
+        return ToolMessage(content=f"Error: unknown tool '{name}'", tool_call_id=call["id"], name=name, status="error")
+
+    arguments = call.get("args") or {}
+    try:
+        if tool.cacheable:
+            key = tool_cache_key(tool.builtin_name, tool.version, arguments, tool.file_arguments)
+            content = await tool_result_cache.get_or_run(
+                key,
+                lambda: asyncio.wait_for(_run_tool(tool, arguments), timeout=tool.timeout),
+                ttl=tool.cache_ttl
+            )
+        else:
+            content = await asyncio.wait_for(_run_tool(tool, arguments), timeout=tool.timeout)
+        return ToolMessage(content=content, tool_call_id=call["id"], name=name)
+    except asyncio.TimeoutError:
+        content = f"Error: tool '{name}' timed out after {tool.timeout:g}s"
+    except Exception as e:
+        content = f"Error: tool '{name}' failed: {str(e)}"
+    logger.warning("Tool call %s (%s) failed: %s", call["id"], name, content)
+    return ToolMessage(content=content, tool_call_id=call["id"], name=name, status="error")
+
+
+async def execute_tool_calls(tool_calls: Sequence[Dict[str, Any]], tools: Sequence[BoundTool]) -> List[ToolMessage]:
+    """Execute independent tool calls concurrently, returning results in call order."""
+    tools_by_name = {tool.name: tool for tool in tools}
+    return list(await asyncio.gather(*(execute_tool_call(call, tools_by_name) for call in tool_calls)))
@@ -0,0 +1,104 @@
+"""Memoization of deterministic tool call results."""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from app.core.config import settings
+from app.services.config_cache import TTLCache
+
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    """Serialize tool arguments so equivalent calls produce the same string."""
+    cleaned = {key: value for key, value in arguments.items() if value is not None}
+    return json.dumps(cleaned, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def tool_cache_key(
+    tool_name: str,
+    version: str,
+    arguments: Dict[str, Any],
+    file_arguments: Iterable[str] = ()
+) -> str:
+    """Key a call by tool, tool version and canonical arguments.
+
+    Arguments listed in file_arguments name files on disk; their size and
+    mtime are folded into the key so an edited file is not served stale.
+    """
+    parts = [tool_name, version, canonical_arguments(arguments)]
+    for name in file_arguments:
+        path = arguments.get(name)
+        if not path:
+            continue
+        try:
+            stat = os.stat(path)
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """LRU cache of tool results with per-entry TTLs and in-flight call sharing.
+
+    Identical calls issued while the first is still running wait for its
+    result instead of executing the tool again.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        """Initialize an empty cache."""
+        self._cache: TTLCache[str] = TTLCache(ttl, max_size)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def get_or_run(self, key: str, run: Callable[[], Awaitable[str]], ttl: Optional[float] = None) -> str:
+        """Return the cached result for a key, or run the call once and cache it."""
+        found, value = self._cache.get(key)
+        if found:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The call we were waiting on was cancelled; run our own below
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: there may be no waiters
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        # Only successful results are cached
+        self._cache.set(key, value, ttl)
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit ratio and coalesced call count."""
+        stats = self._cache.stats()
+        stats["in_flight"] = len(self._inflight)
+        stats["coalesced"] = self.coalesced
+        return stats
+
+
+tool_result_cache = ToolResultCache(
+    ttl=settings.TOOL_RESULT_CACHE_TTL,
+    max_size=settings.TOOL_RESULT_CACHE_MAX_SIZE
+)
@@ -1,8 +1,11 @@
 """Service for tool CRUD operations."""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.models.database_models import Tool
 from app.schemas.pydantic_models import ToolCreate, ToolUpdate
+from app.services.config_cache import ToolSnapshot, agent_config_cache, invalidate_agent_caches
 
 
 class ToolService:
@@ -15,6 +18,7 @@ class ToolService:
         db.add(db_tool)
         db.commit()
         db.refresh(db_tool)
+        invalidate_agent_caches(db_tool.agent_id)
         return db_tool
     
     @staticmethod
@@ -49,12 +53,15 @@ class ToolService:
         if not db_tool:
             return None
         
+        previous_agent_id = db_tool.agent_id
         update_data = tool_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_tool, field, value)
         
         db.commit()
         db.refresh(db_tool)
+        invalidate_agent_caches(previous_agent_id)
+        invalidate_agent_caches(db_tool.agent_id)
         return db_tool
     
     @staticmethod
@@ -64,9 +71,95 @@ class ToolService:
         if not db_tool:
             return False
         
+        agent_id = db_tool.agent_id
         db.delete(db_tool)
         db.commit()
+        invalidate_agent_caches(agent_id)
         return True
 
 
-
+class AsyncToolService:
+    """Async service class for tool operations."""
+    
+    @staticmethod
+    async def create_tool(db: AsyncSession, tool: ToolCreate) -> Tool:
+        """Create a new tool."""
+        db_tool = Tool(**tool.model_dump())
+        db.add(db_tool)
+        await db.commit()
+        await db.refresh(db_tool)
+        invalidate_agent_caches(db_tool.agent_id)
+        return db_tool
+    
+    @staticmethod
+    async def get_tool(db: AsyncSession, tool_id: int) -> Optional[Tool]:
+        """Get tool by ID."""
+        result = await db.execute(select(Tool).where(Tool.id == tool_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_tool_by_name(db: AsyncSession, name: str) -> Optional[Tool]:
+        """Get tool by name."""
+        result = await db.execute(select(Tool).where(Tool.name == name))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_all_tools(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Tool]:
+        """Get all tools."""
+        result = await db.execute(select(Tool).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_tools_by_agent(db: AsyncSession, agent_id: int) -> List[Tool]:
+        """Get all tools for a specific agent."""
+        result = await db.execute(select(Tool).where(Tool.agent_id == agent_id))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_tool_configs_by_agent(db: AsyncSession, agent_id: int) -> Tuple[ToolSnapshot, ...]:
+        """Get cached, detached snapshots of an agent's tools, reading through to the DB on a miss."""
+        found, snapshots = agent_config_cache.tools.get(agent_id)
+        if found:
+            return snapshots
+        
+        db_tools = await AsyncToolService.get_tools_by_agent(db, agent_id)
+        snapshots = tuple(ToolSnapshot.from_model(tool) for tool in db_tools)
+        agent_config_cache.tools.set(agent_id, snapshots)
+        return snapshots
+    
+    @staticmethod
+    async def get_builtin_tools(db: AsyncSession) -> List[Tool]:
+        """Get all builtin tools."""
+        result = await db.execute(select(Tool).where(Tool.tool_type == "builtin"))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def update_tool(db: AsyncSession, tool_id: int, tool_update: ToolUpdate) -> Optional[Tool]:
+        """Update a tool."""
+        db_tool = await AsyncToolService.get_tool(db, tool_id)
+        if not db_tool:
+            return None
+        
+        previous_agent_id = db_tool.agent_id
+        update_data = tool_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_tool, field, value)
+        
+        await db.commit()
+        await db.refresh(db_tool)
+        invalidate_agent_caches(previous_agent_id)
+        invalidate_agent_caches(db_tool.agent_id)
+        return db_tool
+    
+    @staticmethod
+    async def delete_tool(db: AsyncSession, tool_id: int) -> bool:
+        """Delete a tool."""
+        db_tool = await AsyncToolService.get_tool(db, tool_id)
+        if not db_tool:
+            return False
+        
+        agent_id = db_tool.agent_id
+        await db.delete(db_tool)
+        await db.commit()
+        invalidate_agent_caches(agent_id)
+        return True
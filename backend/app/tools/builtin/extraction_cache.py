@@ -0,0 +1,147 @@
+"""Content-addressed cache for PDF extraction results (memory LRU + SQLite)."""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+
+class ExtractionCache:
+    """Two-tier cache of JSON strings keyed by content hash.
+
+    Reads check an in-memory LRU first, then an on-disk SQLite store; disk
+    hits are promoted into memory. Both tiers are bounded by total bytes and
+    evict least recently used entries.
+    """
+
+    def __init__(self, db_path: str, max_disk_bytes: int, max_memory_bytes: int):
+        """Open (or create) the on-disk store."""
+        self.db_path = db_path
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_extraction_cache_accessed ON extraction_cache (accessed)")
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for a key, or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+            row = self._conn.execute("SELECT value FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extraction_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            value = zlib.decompress(row[0]).decode("utf-8")
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value in both tiers."""
+        blob = zlib.compress(value.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            self._disk_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict_disk()
+            self._conn.commit()
+            self._remember(key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the memory tier, evicting LRU entries over the byte budget."""
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        if len(value) > self.max_memory_bytes:
+            return
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        """Delete least recently accessed rows until the store fits its budget."""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM extraction_cache ORDER BY accessed ASC").fetchall()
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            self._conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+            self._disk_bytes -= size
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._conn.execute("DELETE FROM extraction_cache")
+            self._conn.commit()
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return tier sizes and hit counters."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": ((self.memory_hits + self.disk_hits) / lookups) if lookups else 0.0,
+            }
+
+
+_default_cache: Optional[ExtractionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Get the shared extraction cache configured from settings (None when disabled)."""
+    global _default_cache
+    if not settings.PDF_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ExtractionCache(
+                    settings.PDF_CACHE_PATH,
+                    max_disk_bytes=settings.PDF_CACHE_MAX_DISK_BYTES,
+                    max_memory_bytes=settings.PDF_CACHE_MAX_MEMORY_BYTES
+                )
+    return _default_cache
+
+
+def extraction_cache_stats() -> Optional[Dict[str, Any]]:
+    """Stats for the shared cache, or None if it has not been opened."""
+    return _default_cache.stats() if _default_cache is not None else None
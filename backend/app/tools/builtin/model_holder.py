@@ -0,0 +1,53 @@
+"""Lazy, process-wide holders for heavy models used by builtin tools."""
+import threading
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyModel(Generic[T]):
+    """Thread-safe holder that loads a model on first use and reuses it forever."""
+
+    def __init__(self, name: str, loader: Callable[[], T]):
+        """Initialize the holder; nothing is loaded until get() is called."""
+        self.name = name
+        self._loader = loader
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the model has been loaded."""
+        return self._value is not None
+
+    def get(self) -> T:
+        """Return the model, loading it exactly once across threads."""
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._loader()
+                value = self._value
+        return value
+
+
+_models: Dict[str, LazyModel] = {}
+_models_lock = threading.Lock()
+
+
+def register_model(name: str, loader: Callable[[], T]) -> LazyModel[T]:
+    """Register a lazily loaded model under a name (idempotent)."""
+    with _models_lock:
+        holder = _models.get(name)
+        if holder is None:
+            holder = LazyModel(name, loader)
+            _models[name] = holder
+        return holder
+
+
+def warm_up_models(names: Optional[Iterable[str]] = None) -> None:
+    """Load registered models now instead of on the first request."""
+    with _models_lock:
+        holders = [_models[name] for name in names] if names is not None else list(_models.values())
+    for holder in holders:
+        holder.get()
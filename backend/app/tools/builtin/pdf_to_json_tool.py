@@ -1,66 +1,499 @@
-import io, json, logging
+import io, json, logging, os, tempfile, time
+import base64
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 from PIL import Image
 import pdfplumber
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from pdfminer.pdftypes import PDFStream, resolve1
+from app.core.config import settings
+from app.tools.builtin.extraction_cache import ExtractionCache, get_extraction_cache
+from app.tools.builtin.model_holder import register_model
+
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+
+# Bump when extraction output changes so cached results are not reused
+TOOL_VERSION = "2"
+
+# Rasterization DPI for cropped images
+IMAGE_RESOLUTION = 150
+
+# Part of every cache key: results depend on tool, model and DPI
+CACHE_VERSION = f"pdf_to_json/{TOOL_VERSION}/{BLIP_MODEL_NAME}/{IMAGE_RESOLUTION}"
+
+# Below this many pages the process pool costs more than it saves
+MIN_PAGES_FOR_PARALLEL = 4
+
+
+def _load_blip():
+    """Load the BLIP processor and model (imports transformers on first use)."""
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+
+    print("🔹 Loading BLIP image captioning model...")
+    processor = BlipProcessor.from_pretrained(BLIP_MODEL_NAME)
+    model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_NAME)
+    model.eval()
+    print("✅ BLIP model loaded successfully.")
+    return processor, model
+
+
+# Shared by every PDFToJSONTool instance in the process
+blip_model = register_model("blip-image-captioning", _load_blip)
+
+# Used from several threads at once (local OCR, agent tools, page streaming),
+# so it is created under a lock and sized once; callers bound their own
+# in-flight shards instead of resizing it.
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _default_workers() -> int:
+    """Size of the shared extraction process pool."""
+    return settings.PDF_EXTRACTION_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction process pool, creating it on first use."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: forking a process that already holds torch threads is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_default_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Shut down the shared extraction process pool."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _upload_path(file_path: str) -> str:
+    """Resolve a model-supplied path, refusing anything outside the upload directory."""
+    upload_dir = os.path.realpath(settings.PDF_TOOL_UPLOAD_DIR)
+    path = os.path.realpath(file_path)
+    if os.path.commonpath([upload_dir, path]) != upload_dir:
+        raise ValueError(f"file_path must be inside the upload directory ({settings.PDF_TOOL_UPLOAD_DIR})")
+    return path
+
+
+def _stream_bytes(obj) -> bytes:
+    """Return the raw bytes of a PDF stream object."""
+    data = obj.get_rawdata()
+    return data if data is not None else obj.get_data()
+
+
+def _hash_resources(digest, resources, depth: int = 0) -> None:
+    """Feed font names and XObject contents (recursively for forms) into a digest."""
+    resources = resolve1(resources) or {}
+    fonts = resolve1(resources.get("Font")) or {}
+    for name in sorted(fonts):
+        font = resolve1(fonts[name]) or {}
+        digest.update(f"font:{name}:{font.get('BaseFont')}".encode())
+    xobjects = resolve1(resources.get("XObject")) or {}
+    for name in sorted(xobjects):
+        xobject = resolve1(xobjects[name])
+        if isinstance(xobject, PDFStream):
+            digest.update(f"xobject:{name}:".encode())
+            digest.update(_stream_bytes(xobject))
+            if depth < 4 and "Resources" in xobject.attrs:
+                _hash_resources(digest, xobject.attrs["Resources"], depth + 1)
+
+
+def page_fingerprint(page) -> str:
+    """Hash what determines a page's extraction output: geometry, content streams, fonts and images."""
+    page_obj = page.page_obj
+    digest = hashlib.sha256()
+    digest.update(f"{page_obj.mediabox}:{page_obj.cropbox}:{page_obj.rotate}".encode())
+    for content in page_obj.contents:
+        content = resolve1(content)
+        if isinstance(content, PDFStream):
+            digest.update(_stream_bytes(content))
+    _hash_resources(digest, page_obj.resources)
+    return digest.hexdigest()
+
+
+def _extract_pages(source: Union[bytes, str], page_numbers: List[int], resolution: int = IMAGE_RESOLUTION) -> List[dict]:
+    """Extract text and rasterized images (PNG bytes) for a shard of 1-based page numbers.
+
+    Runs in worker processes, so it only returns picklable data.
+    """
+    results = []
+    stream = io.BytesIO(source) if isinstance(source, bytes) else source
+
+    with pdfplumber.open(stream) as pdf:
+        for i in page_numbers:
+            page = pdf.pages[i - 1]
+
+            started = time.perf_counter()
+            page_text = (page.extract_text() or "").strip()
+            text_done = time.perf_counter()
+
+            images = []
+
+            # Extract images safely
+            for img_index, img_obj in enumerate(page.images):
+                try:
+                    # Attempt to crop — but relax bbox constraints
+                    x0, top, x1, bottom = img_obj["x0"], img_obj["top"], img_obj["x1"], img_obj["bottom"]
+
+                    # Clamp coordinates within page bounds to avoid exceptions
+                    x0 = max(x0, 0)
+                    top = max(top, 0)
+                    x1 = min(x1, page.width)
+                    bottom = min(bottom, page.height)
+
+                    if x1 <= x0 or bottom <= top:
+                        raise ValueError("Invalid image coordinates after clamping.")
+
+                    cropped = page.crop((x0, top, x1, bottom)).to_image(resolution=resolution)
+                    img_bytes = io.BytesIO()
+                    cropped.original.save(img_bytes, format="PNG")
+                    images.append(img_bytes.getvalue())
+
+                except Exception as e:
+                    logging.warning(f"[WARN] Could not process image {img_index+1} on page {i}: {e}")
+                    continue
+
+            results.append({
+                "page_number": i,
+                "text": page_text,
+                "images": images,
+                "timings": {
+                    "extract_text_ms": round((text_done - started) * 1000, 2),
+                    "rasterize_ms": round((time.perf_counter() - text_done) * 1000, 2),
+                }
+            })
+
+    return results
+
 
 class PDFToJSONTool:
     """Extracts text and image captions from PDFs using pdfplumber + BLIP."""
 
-    def __init__(self):
-        print("🔹 Loading BLIP image captioning model...")
-        self.processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        self.model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-        print("✅ BLIP model loaded successfully.")
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = 2,
+        caption_batch_size: int = 8,
+        max_held_pages: int = 4,
+        cache: Optional[ExtractionCache] = None,
+        use_cache: bool = True
+    ):
+        """
+        Args:
+            workers: Parallelism of page-sharded extraction on the shared
+                process pool (PDF_EXTRACTION_WORKERS processes). None uses
+                the pool size; 1 keeps everything in-process.
+            pages_per_task: Contiguous pages handed to a worker per task.
+            caption_batch_size: Images captioned per BLIP forward pass; also
+                the most decoded images held in memory at once.
+            max_held_pages: Pages allowed to wait on a partially filled
+                caption batch before it is flushed early.
+            cache: Result cache; defaults to the shared cache from settings.
+            use_cache: Set False to always re-extract.
+        """
+        self.workers = workers if workers is not None else _default_workers()
+        self.pages_per_task = max(1, pages_per_task)
+        self.caption_batch_size = max(1, caption_batch_size)
+        self.max_held_pages = max(1, max_held_pages)
+        self.cache = (cache or get_extraction_cache()) if use_cache else None
 
-    def run(self, file_bytes: bytes):
-        """Extracts text and images → JSON."""
-        pages_data = []
-        pdf_stream = io.BytesIO(file_bytes)
+    @property
+    def processor(self):
+        """BLIP processor, loaded on first use and shared process-wide."""
+        return blip_model.get()[0]
 
-        with pdfplumber.open(pdf_stream) as pdf:
-            total_pages = len(pdf.pages)
-            logging.info(f"📄 Starting PDF parsing: {total_pages} pages detected")
+    @property
+    def model(self):
+        """BLIP model, loaded on first use and shared process-wide."""
+        return blip_model.get()[1]
+
+    def _iter_extracted_pages(self, file_bytes: bytes, page_numbers: List[int], workers: int) -> Iterator[dict]:
+        """Yield the given pages extracted in order, fanning shards out over the process pool."""
+        shards = [page_numbers[i:i + self.pages_per_task] for i in range(0, len(page_numbers), self.pages_per_task)]
+
+        if workers <= 1 or len(page_numbers) < MIN_PAGES_FOR_PARALLEL:
+            for shard in shards:
+                yield from _extract_pages(file_bytes, shard)
+            return
+
+        # Workers open the document from a temp file instead of receiving
+        # the full byte string with every task.
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_bytes)
+
+            pool = _get_process_pool()
+            pending = deque()
+            shard_iter = iter(shards)
+
+            # Keep a bounded window of shards in flight and collect them in order
+            for shard in shard_iter:
+                pending.append(pool.submit(_extract_pages, pdf_path, shard))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                yield from pending.popleft().result()
+                next_shard = next(shard_iter, None)
+                if next_shard is not None:
+                    pending.append(pool.submit(_extract_pages, pdf_path, next_shard))
+        finally:
+            os.remove(pdf_path)
+
+    def _caption_batch(self, png_images: List[bytes]) -> List[Optional[str]]:
+        """Caption a batch of PNG images in one BLIP forward pass.
+
+        Returns one caption per input, None for images that could not be decoded.
+        """
+        captions: List[Optional[str]] = [None] * len(png_images)
+        decoded, positions = [], []
+        for pos, png_bytes in enumerate(png_images):
+            try:
+                decoded.append(Image.open(io.BytesIO(png_bytes)).convert("RGB"))
+                positions.append(pos)
+            except Exception as e:
+                logging.warning(f"[WARN] Could not decode image for captioning: {e}")
+        if not decoded:
+            return captions
 
-            for i, page in enumerate(pdf.pages, start=1):
-                page_text = (page.extract_text() or "").strip()
-                image_captions = []
+        import torch
 
-                # Extract images safely
-                for img_index, img_obj in enumerate(page.images):
+        with torch.inference_mode():
+            inputs = self.processor(images=decoded, return_tensors="pt")
+            output = self.model.generate(**inputs)
+        for pos, caption in zip(positions, self.processor.batch_decode(output, skip_special_tokens=True)):
+            captions[pos] = caption
+        return captions
+
+    def _iter_captioned_pages(self, extracted_pages: Iterator[dict], batch_size: int) -> Iterator[dict]:
+        """Caption images across pages in batches and yield finished pages in page order."""
+        waiting = deque()  # pages (in order) whose captions may still be pending
+        pending = []  # (page, image index, png bytes) awaiting the next batch
+
+        def flush():
+            batch = pending[:]
+            pending.clear()
+            started = time.perf_counter()
+            try:
+                captions = self._caption_batch([png for _, _, png in batch])
+            except Exception as e:
+                logging.warning(f"[WARN] Batch captioning failed, retrying images one by one: {e}")
+                captions = []
+                for _, _, png in batch:
                     try:
-                        # Attempt to crop — but relax bbox constraints
-                        x0, top, x1, bottom = img_obj["x0"], img_obj["top"], img_obj["x1"], img_obj["bottom"]
-
-                        # Clamp coordinates within page bounds to avoid exceptions
-                        x0 = max(x0, 0)
-                        top = max(top, 0)
-                        x1 = min(x1, page.width)
-                        bottom = min(bottom, page.height)
-
-                        if x1 <= x0 or bottom <= top:
-                            raise ValueError("Invalid image coordinates after clamping.")
-
-                        cropped = page.crop((x0, top, x1, bottom)).to_image(resolution=150)
-                        img_bytes = io.BytesIO()
-                        cropped.original.save(img_bytes, format="PNG")
-
-                        image = Image.open(io.BytesIO(img_bytes.getvalue())).convert("RGB")
-                        inputs = self.processor(images=image, return_tensors="pt")
-                        output = self.model.generate(**inputs)
-                        caption = self.processor.decode(output[0], skip_special_tokens=True)
-                        image_captions.append(caption)
-
-                    except Exception as e:
-                        logging.warning(f"[WARN] Could not process image {img_index+1} on page {i}: {e}")
-                        continue
-
-                # Store structured data
-                pages_data.append({
-                    "page_number": i,
-                    "text": page_text,
-                    "image_captions": image_captions
-                })
+                        captions.extend(self._caption_batch([png]))
+                    except Exception:
+                        captions.append(None)
+            per_image_ms = (time.perf_counter() - started) * 1000 / len(batch)
+            for (page, img_index, _), caption in zip(batch, captions):
+                if caption is None:
+                    logging.warning(f"[WARN] Could not process image {img_index+1} on page {page['page_number']}")
+                else:
+                    page["captions"][img_index] = caption
+                page["timings"]["caption_ms"] += per_image_ms
+                page["remaining"] -= 1
+
+        def ready_pages():
+            while waiting and waiting[0]["remaining"] == 0:
+                yield waiting.popleft()
+
+        for extracted in extracted_pages:
+            page = {
+                "page_number": extracted["page_number"],
+                "text": extracted["text"],
+                "captions": {},
+                "remaining": len(extracted["images"]),
+                "timings": dict(extracted["timings"], caption_ms=0.0),
+            }
+            waiting.append(page)
+            for img_index, png_bytes in enumerate(extracted["images"]):
+                pending.append((page, img_index, png_bytes))
+                if len(pending) >= batch_size:
+                    flush()
+            # Bound how long finished pages wait behind a partially filled batch
+            if pending and len(waiting) > self.max_held_pages:
+                flush()
+            yield from ready_pages()
+
+        if pending:
+            flush()
+        yield from ready_pages()
+
+    def _document_key(self, file_bytes: bytes) -> str:
+        """Cache key for a whole document's manifest of page keys."""
+        return f"manifest:{hashlib.sha256(file_bytes).hexdigest()}:{CACHE_VERSION}"
+
+    def _cached_document_pages(self, file_bytes: bytes) -> Optional[List[str]]:
+        """Return the cached page JSON strings of an identical document, or None."""
+        manifest = self.cache.get(self._document_key(file_bytes))
+        if manifest is None:
+            return None
+        pages = [self.cache.get(key) for key in json.loads(manifest)]
+        # A page evicted behind the manifest's back means a normal (page-level) run
+        return None if any(page is None for page in pages) else pages
+
+    def _iter_page_records(self, file_bytes: bytes, workers: int, include_timings: bool) -> Iterator[dict]:
+        """Yield page records in order, reusing cached pages and extracting only the rest."""
+        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+            total_pages = len(pdf.pages)
+            page_keys = [f"page:{page_fingerprint(page)}:{CACHE_VERSION}" for page in pdf.pages] if self.cache else []
 
+        cached_pages: Dict[int, dict] = {}
+        for i, key in enumerate(page_keys, start=1):
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached_pages[i] = json.loads(cached)
+
+        missing = [i for i in range(1, total_pages + 1) if i not in cached_pages]
+        logging.info(
+            f"📄 Starting PDF parsing: {total_pages} pages detected, "
+            f"{len(cached_pages)} cached, {len(missing)} to extract ({workers} workers)"
+        )
+
+        extracted_pages = self._iter_extracted_pages(file_bytes, missing, workers)
+        processed = self._iter_captioned_pages(extracted_pages, self.caption_batch_size)
+
+        for i in range(1, total_pages + 1):
+            if i in cached_pages:
+                page_record = {"page_number": i, **cached_pages.pop(i)}
+                if include_timings:
+                    page_record["timings"] = {"cached": True}
+                yield page_record
+                continue
+
+            page = next(processed)
+            # Store structured data
+            page_record = {
+                "page_number": page["page_number"],
+                "text": page["text"],
+                "image_captions": [page["captions"][k] for k in sorted(page["captions"])]
+            }
+            if self.cache:
+                self.cache.set(
+                    page_keys[i - 1],
+                    json.dumps({"text": page_record["text"], "image_captions": page_record["image_captions"]}, ensure_ascii=False)
+                )
+            if include_timings:
+                page["timings"]["caption_ms"] = round(page["timings"]["caption_ms"], 2)
+                page_record["timings"] = page["timings"]
+            yield page_record
+
+        # Every page is cached now; remember which ones make up this document
+        if self.cache:
+            self.cache.set(self._document_key(file_bytes), json.dumps(page_keys))
+
+    def iter_pages(self, file_bytes: bytes, workers: Optional[int] = None, include_timings: bool = False) -> Iterator[dict]:
+        """Yield each page record as soon as it is ready, in page order.
+
+        Only the pages in flight are held in memory, so callers can forward
+        page 1 while later pages are still being processed.
+        """
+        workers = self.workers if workers is None else workers
+        started = time.perf_counter()
+
+        # Identical document already processed: skip even opening it
+        cached_pages = self._cached_document_pages(file_bytes) if self.cache else None
+        if cached_pages is not None:
+            logging.info(f"✅ PDF to JSON served from cache — {len(cached_pages)} pages")
+            for i, cached in enumerate(cached_pages, start=1):
+                page_record = {"page_number": i, **json.loads(cached)}
+                if include_timings:
+                    page_record["timings"] = {"cached": True}
+                yield page_record
+            return
+
+        count = 0
+        for page_record in self._iter_page_records(file_bytes, workers, include_timings):
+            count += 1
+            yield page_record
+        logging.info(f"✅ PDF to JSON completed — {count} pages extracted in {time.perf_counter() - started:.2f}s")
+
+    def iter_ndjson(self, file_bytes: bytes, workers: Optional[int] = None, include_timings: bool = False) -> Iterator[str]:
+        """Yield one compact JSON line (newline-terminated) per page."""
+        for page_record in self.iter_pages(file_bytes, workers, include_timings):
+            yield json.dumps(page_record, ensure_ascii=False) + "\n"
+
+    async def aiter_pages(
+        self,
+        file_bytes: bytes,
+        workers: Optional[int] = None,
+        include_timings: bool = False,
+        max_buffered_pages: int = 2
+    ) -> AsyncIterator[dict]:
+        """Async variant of iter_pages that runs extraction in a background thread.
+
+        At most ``max_buffered_pages`` finished pages wait for the consumer;
+        extraction pauses until they are taken, and stops if the consumer goes away.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered_pages)
+        stopped = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for page_record in self.iter_pages(file_bytes, workers, include_timings):
+                    if stopped.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put(page_record), loop).result()
+                item = done
+            except Exception as e:
+                item = e
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            # Unblock a producer waiting on a full queue; it exits before the next page
+            while not queue.empty():
+                queue.get_nowait()
+
+    def run(self, file_bytes: bytes, workers: Optional[int] = None, include_timings: bool = False, output_format: str = "json"):
+        """Extracts text and images → JSON.
+
+        Args:
+            file_bytes: Raw PDF content.
+            workers: Override the instance worker count for this call.
+            include_timings: Add a per-page "timings" breakdown to the output.
+            output_format: "json" for an indented array, "ndjson" for one
+                compact JSON object per line.
+        """
+        if output_format == "ndjson":
+            return "".join(self.iter_ndjson(file_bytes, workers, include_timings))
+
+        pages_data = list(self.iter_pages(file_bytes, workers, include_timings))
         result_json = json.dumps(pages_data, indent=2, ensure_ascii=False)
-        logging.info(f"✅ PDF to JSON completed — {len(pages_data)} pages extracted, total output size: {len(result_json)} chars")
-        return result_json
\ No newline at end of file
+        logging.info(f"✅ PDF to JSON output size: {len(result_json)} chars")
+        return result_json
+
+    def invoke(self, arguments: Dict[str, Any]) -> str:
+        """Run the tool from agent tool-call arguments and return NDJSON pages."""
+        if arguments.get("file_path"):
+            with open(_upload_path(arguments["file_path"]), "rb") as f:
+                file_bytes = f.read()
+        elif arguments.get("file_bytes"):
+            file_bytes = base64.b64decode(arguments["file_bytes"])
+        else:
+            raise ValueError("One of file_bytes or file_path is required")
+        return self.run(file_bytes, output_format="ndjson")
@@ -1,31 +1,37 @@
 """Registry for builtin tools."""
-from typing import Dict, Type, Any
-from app.tools.builtin.pdf_to_json_tool import PDFToJSONTool
+import importlib
+import sys
+import threading
+from typing import Dict, Type, Any, Optional
+from app.tools.builtin.model_holder import warm_up_models
 
-# Registry mapping tool names to their classes
+# Registry mapping tool names to their classes. Classes are given as
+# "module:attribute" paths and imported on first use, so importing the
+# registry does not pull in heavy dependencies (torch, transformers).
 BUILTIN_TOOL_REGISTRY: Dict[str, Dict[str, Any]] = {
     "pdf_to_json": {
         "name": "PDF to JSON",
-        "description": "Extracts text and image captions from PDF files and converts them to JSON format. Use this tool when the user asks about PDF content, wants to extract information from a PDF, or needs to process a document. The tool can accept file_id (reference ID from uploaded PDF), file_bytes (the PDF file content as bytes), or file_path (path to the PDF file). When a user uploads a PDF through the chat interface, use the file_id returned from the upload. Format: Use tool: pdf_to_json with file_id: <file_id> or file_bytes: <pdf_file_bytes> or file_path: <path_to_pdf_file>",
+        "description": "Extracts text and image captions from PDF files and converts them to JSON format. Use this tool when the user asks about PDF content, wants to extract information from a PDF, or needs to process a document. The tool accepts file_bytes (the PDF file content, base64 encoded) or file_path (path of a PDF in the uploads directory). Format: Use tool: pdf_to_json with file_bytes: <base64_pdf_bytes> or file_path: <path_to_uploaded_pdf>",
         "tool_type": "builtin",
-        "class": PDFToJSONTool,
+        "class": "app.tools.builtin.pdf_to_json_tool:PDFToJSONTool",
+        "timeout": 300.0,  # Seconds before an agent tool call is abandoned
+        "version": "2",  # Keep in step with pdf_to_json_tool.TOOL_VERSION; part of result cache keys
+        "cacheable": True,  # Same arguments (and file contents) give the same result
+        "cache_ttl": 3600.0,
+        "file_arguments": ["file_path"],  # Arguments naming files whose size/mtime go into cache keys
         "parameters": {
             "type": "object",
             "properties": {
-                "file_id": {
-                    "type": "string",
-                    "description": "File ID from uploaded PDF (returned when user uploads a PDF). Use this when processing an uploaded PDF."
-                },
                 "file_bytes": {
                     "type": "string",
                     "description": "PDF file content as bytes (base64 encoded string) or raw bytes. Use this when PDF is uploaded directly."
                 },
                 "file_path": {
                     "type": "string",
-                    "description": "Full path to the PDF file to process (e.g., /path/to/file.pdf). Use this when PDF is stored on the file system."
+                    "description": "Path of an uploaded PDF inside the uploads directory (e.g., uploads/report.pdf). Paths outside it are rejected."
                 }
             },
-            "required": []  # At least one of file_id, file_bytes, or file_path is required
+            "required": []  # At least one of file_bytes or file_path is required
         }
     }
 }
@@ -34,17 +40,63 @@ def get_builtin_tool_definitions():
     """Get all builtin tool definitions."""
     return BUILTIN_TOOL_REGISTRY
 
+
+def resolve_builtin_tool_name(*candidates: Optional[str]) -> Optional[str]:
+    """Map a Tool row's name or implementation to a registry key."""
+    for candidate in candidates:
+        if not candidate:
+            continue
+        if candidate in BUILTIN_TOOL_REGISTRY:
+            return candidate
+        for tool_name, tool_def in BUILTIN_TOOL_REGISTRY.items():
+            if candidate.lower() == tool_def["name"].lower():
+                return tool_name
+    return None
+
+_tool_classes: Dict[str, Type] = {}
+_tool_instances: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
 def get_builtin_tool_class(tool_name: str):
-    """Get the class for a builtin tool by name."""
+    """Get the class for a builtin tool by name, importing its module on first use."""
     tool_def = BUILTIN_TOOL_REGISTRY.get(tool_name)
-    if tool_def:
-        return tool_def["class"]
-    return None
+    if not tool_def:
+        return None
+    tool_class = _tool_classes.get(tool_name)
+    if tool_class is None:
+        module_path, _, attribute = tool_def["class"].partition(":")
+        tool_class = getattr(importlib.import_module(module_path), attribute)
+        _tool_classes[tool_name] = tool_class
+    return tool_class
+
 
 def create_builtin_tool_instance(tool_name: str):
-    """Create an instance of a builtin tool."""
-    tool_class = get_builtin_tool_class(tool_name)
-    if tool_class:
-        return tool_class()
-    return None
+    """Get the shared instance of a builtin tool, creating it on first use."""
+    instance = _tool_instances.get(tool_name)
+    if instance is not None:
+        return instance
+    with _lock:
+        instance = _tool_instances.get(tool_name)
+        if instance is None:
+            tool_class = get_builtin_tool_class(tool_name)
+            if tool_class is None:
+                return None
+            instance = tool_class()
+            _tool_instances[tool_name] = instance
+    return instance
+
+
+def warm_up_builtin_tools():
+    """Instantiate every builtin tool and load its models ahead of the first request."""
+    # Importing the tool modules registers their models with the model holder
+    for tool_name in BUILTIN_TOOL_REGISTRY:
+        create_builtin_tool_instance(tool_name)
+    warm_up_models()
+
 
+def shutdown_builtin_tools():
+    """Release worker pools held by builtin tools that were actually loaded."""
+    pdf_module = sys.modules.get("app.tools.builtin.pdf_to_json_tool")
+    if pdf_module is not None:
+        pdf_module.shutdown_process_pool()
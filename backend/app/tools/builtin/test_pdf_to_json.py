@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from pdf_to_json_tool import PDFToJSONTool
+from app.tools.builtin.pdf_to_json_tool import PDFToJSONTool
 
 if __name__ == "__main__":
     pdf_path = Path("/Users/yash.honrao/Downloads/test.pdf")
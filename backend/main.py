@@ -1,19 +1,62 @@
 """FastAPI application entry point."""
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base, get_db
-from app.api import agents, tools, chat, models, ocr
+from app.core.database import async_engine
+from app.core.http_client import init_http_client, close_http_client
+from app.api import agents, tools, chat, conversations, models, ocr, metrics
 from app.api.websocket import websocket_endpoint
+from app.services.llm_registry import init_llm_registry, shutdown_llm_registry
+from app.services.model_catalog import model_catalog
+from app.services.model_residency import model_residency
+from app.services.ocr_job_service import ocr_job_manager
+from app.services.ocr_backends import shutdown_ocr_backends
+from app.services.tool_executor import shutdown_tool_executor
+from app.tools.builtin.registry import warm_up_builtin_tools, shutdown_builtin_tools
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and tear down application-scoped resources."""
+    init_http_client()
+    llm_registry = init_llm_registry()
+    app.state.llm_registry = llm_registry
+    eviction_task = asyncio.create_task(llm_registry.run_eviction_loop())
+    await ocr_job_manager.start()
+    # Preloads the models of active agents in the background
+    await model_residency.start()
+    # Fetch the model list early so the first listing is served from memory
+    model_catalog.refresh_in_background()
+    if settings.BUILTIN_TOOLS_WARMUP:
+        # Load tool models in the background so startup is not blocked
+        asyncio.get_running_loop().run_in_executor(None, warm_up_builtin_tools)
+    try:
+        yield
+    finally:
+        await ocr_job_manager.stop()
+        await model_residency.stop()
+        await model_catalog.stop()
+        eviction_task.cancel()
+        try:
+            await eviction_task
+        except asyncio.CancelledError:
+            pass
+        await shutdown_llm_registry()
+        await close_http_client()
+        shutdown_ocr_backends()
+        shutdown_tool_executor()
+        shutdown_builtin_tools()
+        await async_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="Agentic Chatbot with LangGraph and Ollama"
+    description="Agentic Chatbot with LangGraph and Ollama",
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all localhost ports
@@ -36,19 +79,17 @@ app.add_middleware(
 app.include_router(agents.router, prefix=settings.API_V1_PREFIX)
 app.include_router(tools.router, prefix=settings.API_V1_PREFIX)
 app.include_router(chat.router, prefix=settings.API_V1_PREFIX)
+app.include_router(conversations.router, prefix=settings.API_V1_PREFIX)
 app.include_router(models.router, prefix=settings.API_V1_PREFIX)
 app.include_router(ocr.router, prefix=settings.API_V1_PREFIX)
+app.include_router(metrics.router, prefix=settings.API_V1_PREFIX)
 
 # WebSocket endpoint
 @app.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
     """WebSocket endpoint for chat."""
-    # Get database session
-    db = next(get_db())
-    try:
-        await websocket_endpoint(websocket, db)
-    finally:
-        db.close()
+    # The connection opens its own database sessions, one per concurrent turn
+    await websocket_endpoint(websocket)
 
 
 @app.get("/")
@@ -1,6 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, Loader2, Paperclip, X, FileText, CheckCircle2, AlertCircle } from 'lucide-react';
-import { chatAPI, ocrAPI } from '../services/api';
+import { chatAPI, conversationsAPI, ocrAPI } from '../services/api';
+import type { ChatStreamHandle } from '../services/api';
 import { conversationStorage } from '../services/conversationStorage';
 import type { Conversation, Agent } from '../types';
 
@@ -18,7 +19,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [streamingMessage, setStreamingMessage] = useState('');
-  const [websocket, setWebsocket] = useState<WebSocket | null>(null);
+  const [websocket, setWebsocket] = useState<ChatStreamHandle | null>(null);
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [uploadStatus, setUploadStatus] = useState<'idle' | 'uploading' | 'success' | 'error'>('idle');
   const [uploadMessage, setUploadMessage] = useState<string>('');
@@ -26,7 +27,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const chatContainerRef = useRef<HTMLDivElement>(null);
 
-  // Cleanup WebSocket
+  // Cancel an unfinished WebSocket turn
   useEffect(() => {
     return () => {
       if (websocket) websocket.close();
@@ -96,13 +97,28 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
     }
 
     const userMessage = { role: 'user' as const, content: input.trim() };
+    const history = currentConv.messages
+      .filter((m) => m.role === 'user' || m.role === 'assistant')
+      .map((m) => ({ role: m.role, content: String(m.content || '') }));
+
+    // Keep history on the server so each turn only sends the new message.
+    // Older local conversations are seeded with their existing messages once.
+    let serverId = currentConv.serverId;
+    if (serverId === undefined) {
+      try {
+        const response = await conversationsAPI.create(agent.id, history);
+        serverId = response.data.id;
+        conversationStorage.setServerId(currentConv.id, serverId);
+      } catch (error) {
+        console.error('Could not create server conversation, sending full history:', error);
+      }
+    }
+
     const updatedConversation = conversationStorage.addMessage(currentConv.id, userMessage);
     if (!updatedConversation) return;
     onMessageUpdate(updatedConversation);
 
-    const apiMessages = updatedConversation.messages
-      .filter((m) => m.role === 'user' || m.role === 'assistant')
-      .map((m) => ({ role: m.role, content: String(m.content || '') }));
+    const apiMessages = serverId !== undefined ? [userMessage] : [...history, userMessage];
 
     setInput('');
     setIsLoading(true);
@@ -119,13 +135,26 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
         },
         (error: Error) => {
           console.error('WebSocket error, falling back to SSE:', error);
-          chatAPI.chatStream(agent.id, apiMessages, (chunk: string) => {
+          setWebsocket(null);
+          // The server may already have stored this turn, and chunks that
+          // arrived before the failure are incomplete. Answer the whole local
+          // history without the server conversation, and unlink it so the
+          // next turn seeds a fresh one.
+          assistantContent = '';
+          setStreamingMessage('');
+          if (serverId !== undefined) conversationStorage.clearServerId(updatedConversation.id);
+          chatAPI.chatStream(agent.id, [...history, userMessage], (chunk: string) => {
             assistantContent += chunk;
             setStreamingMessage(assistantContent);
           }).then(() => {
-            const msg = { role: 'assistant' as const, content: assistantContent };
-            const finalConv = conversationStorage.addMessage(updatedConversation.id, msg);
-            if (finalConv) onMessageUpdate(finalConv);
+            if (assistantContent) {
+              const msg = { role: 'assistant' as const, content: assistantContent };
+              const finalConv = conversationStorage.addMessage(updatedConversation.id, msg);
+              if (finalConv) onMessageUpdate(finalConv);
+            }
+          }).catch((sseError) => {
+            console.error('SSE fallback failed:', sseError);
+          }).finally(() => {
             setIsLoading(false);
             setStreamingMessage('');
           });
@@ -139,7 +168,8 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({
           setIsLoading(false);
           setStreamingMessage('');
           setWebsocket(null);
-        }
+        },
+        serverId
       );
       setWebsocket(ws);
     } catch (wsError) {
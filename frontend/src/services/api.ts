@@ -1,13 +1,26 @@
 import axios, { AxiosResponse } from 'axios';
-import type { Agent, Tool, ChatMessage, ChatResponse } from '../types';
+import type { Agent, Tool, ChatMessage, ChatResponse, ServerConversation } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8080/api/v1';
 const WS_BASE_URL = import.meta.env.VITE_WS_BASE_URL || 'ws://localhost:8000';
+const SESSION_KEY = 'agentic_chatbot_session_id';
+
+// Identifies this browser to the backend, which queues model runs fairly per
+// session rather than per address (users behind one proxy share an address)
+const getSessionId = (): string => {
+  let sessionId = localStorage.getItem(SESSION_KEY);
+  if (!sessionId) {
+    sessionId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem(SESSION_KEY, sessionId);
+  }
+  return sessionId;
+};
 
 const api = axios.create({
   baseURL: API_BASE_URL,
   headers: {
     'Content-Type': 'application/json',
+    'X-Session-ID': getSessionId(),
   },
 });
 
@@ -38,76 +51,159 @@ export const modelsAPI = {
   getOllamaModels: () => api.get('/models/ollama'),
 };
 
-// Chat API with WebSocket support
-export const chatAPI = {
-  chat: async (agentId: number, messages: ChatMessage[]): Promise<ChatResponse> => {
-    const response = await api.post<ChatResponse>('/chat/', {
-      agent_id: agentId,
-      messages,
-      stream: false,
-    });
-    return response.data;
-  },
-  
-  // WebSocket-based chat streaming
-  createWebSocket: (
-    agentId: number,
-    messages: ChatMessage[],
-    onMessage: (chunk: string) => void,
-    onError?: (error: Error) => void,
-    onClose?: () => void
-  ): WebSocket => {
-    const ws = new WebSocket(`${WS_BASE_URL}/ws/chat`);
-    
+// Conversations API (server-side history)
+export const conversationsAPI = {
+  create: (agentId: number, messages: ChatMessage[] = []): Promise<AxiosResponse<ServerConversation>> =>
+    api.post('/conversations/', { agent_id: agentId, messages }),
+  delete: (id: number): Promise<AxiosResponse<void>> => api.delete(`/conversations/${id}`),
+};
+
+// Handle to one streamed WebSocket turn; close() cancels it if still running
+export interface ChatStreamHandle {
+  requestId: string;
+  close: () => void;
+}
+
+interface ChatStreamHandlers {
+  onMessage: (chunk: string) => void;
+  onError?: (error: Error) => void;
+  onClose?: () => void;
+}
+
+// One long-lived WebSocket shared by all chat turns. Each turn carries a
+// request_id, so several can stream at once; the server pings and expects
+// a pong, and the socket is reopened on the next request after it drops.
+class ChatSocket {
+  private ws: WebSocket | null = null;
+  private pending = new Map<string, ChatStreamHandlers>();
+  private outbox: string[] = [];
+  private nextId = 0;
+
+  request(payload: Record<string, unknown>, handlers: ChatStreamHandlers): ChatStreamHandle {
+    const requestId = `${Date.now().toString(36)}-${(this.nextId++).toString(36)}`;
+    this.pending.set(requestId, handlers);
+    this.send({ type: 'chat', request_id: requestId, ...payload });
+    return {
+      requestId,
+      close: () => {
+        if (this.pending.has(requestId)) this.send({ type: 'cancel', request_id: requestId });
+      },
+    };
+  }
+
+  private send(message: Record<string, unknown>) {
+    const data = JSON.stringify(message);
+    const ws = this.connect();
+    if (ws.readyState === WebSocket.OPEN) {
+      ws.send(data);
+    } else {
+      this.outbox.push(data);
+    }
+  }
+
+  private connect(): WebSocket {
+    if (this.ws && (this.ws.readyState === WebSocket.OPEN || this.ws.readyState === WebSocket.CONNECTING)) {
+      return this.ws;
+    }
+    const ws = new WebSocket(`${WS_BASE_URL}/ws/chat?session_id=${encodeURIComponent(getSessionId())}`);
+    this.ws = ws;
+
     ws.onopen = () => {
-      ws.send(JSON.stringify({
-        agent_id: agentId,
-        messages,
-        stream: true,
-      }));
+      this.outbox.forEach((data) => ws.send(data));
+      this.outbox = [];
     };
-    
+
     ws.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data);
+        if (data.type === 'ping') {
+          ws.send(JSON.stringify({ type: 'pong' }));
+          return;
+        }
+        const handlers = this.pending.get(data.request_id);
+        if (!handlers) return;
         if (data.type === 'chunk' && data.content) {
-          onMessage(data.content);
-        } else if (data.type === 'done') {
-          ws.close();
-          if (onClose) onClose();
+          handlers.onMessage(data.content);
+        } else if (data.type === 'done' || data.type === 'cancelled') {
+          this.pending.delete(data.request_id);
+          if (handlers.onClose) handlers.onClose();
         } else if (data.type === 'error') {
-          const error = new Error(data.message || 'WebSocket error');
-          if (onError) onError(error);
+          this.pending.delete(data.request_id);
+          if (handlers.onError) handlers.onError(new Error(data.message || 'WebSocket error'));
         }
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
-        if (onError) onError(error as Error);
       }
     };
-    
+
     ws.onerror = (error) => {
       console.error('WebSocket error:', error);
-      if (onError) onError(new Error('WebSocket connection error'));
     };
-    
+
+    // Turns still running on a dropped socket fail, so callers can fall back
     ws.onclose = () => {
-      if (onClose) onClose();
+      if (this.ws === ws) this.ws = null;
+      const orphaned = Array.from(this.pending.values());
+      this.pending.clear();
+      this.outbox = [];
+      orphaned.forEach((handlers) => {
+        if (handlers.onError) handlers.onError(new Error('WebSocket connection error'));
+      });
     };
-    
+
     return ws;
+  }
+}
+
+const chatSocket = new ChatSocket();
+
+// Chat API with WebSocket support
+export const chatAPI = {
+  chat: async (agentId: number, messages: ChatMessage[], conversationId?: number): Promise<ChatResponse> => {
+    const response = await api.post<ChatResponse>('/chat/', {
+      agent_id: agentId,
+      messages,
+      stream: false,
+      conversation_id: conversationId,
+    });
+    return response.data;
   },
   
+  // Stop a running chat request (its id is in the X-Request-ID header of streams)
+  cancel: (requestId: string): Promise<AxiosResponse<{ request_id: string; cancelled: boolean }>> =>
+    api.post(`/chat/cancel/${encodeURIComponent(requestId)}`),
+  
+  // WebSocket-based chat streaming over the shared chat socket
+  createWebSocket: (
+    agentId: number,
+    messages: ChatMessage[],
+    onMessage: (chunk: string) => void,
+    onError?: (error: Error) => void,
+    onClose?: () => void,
+    conversationId?: number
+  ): ChatStreamHandle => chatSocket.request(
+    { agent_id: agentId, messages, stream: true, conversation_id: conversationId },
+    { onMessage, onError, onClose }
+  ),
+  
   // Fallback SSE streaming (for compatibility)
-  chatStream: async (agentId: number, messages: ChatMessage[], onChunk: (chunk: string) => void): Promise<void> => {
+  chatStream: async (
+    agentId: number,
+    messages: ChatMessage[],
+    onChunk: (chunk: string) => void,
+    conversationId?: number
+  ): Promise<void> => {
     const response = await fetch(`${API_BASE_URL}/chat/stream`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        'X-Session-ID': getSessionId(),
       },
       body: JSON.stringify({
         agent_id: agentId,
         messages,
         stream: true,
+        conversation_id: conversationId,
       }),
     });
 
@@ -130,7 +226,7 @@ export const chatAPI = {
       for (const line of lines) {
         if (line.startsWith('data: ')) {
           const data = line.slice(6);
-          if (data === '[DONE]') {
+          if (data === '[DONE]' || data === '[CANCELLED]') {
             return;
           }
           onChunk(data);
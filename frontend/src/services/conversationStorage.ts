@@ -73,6 +73,22 @@ export const conversationStorage = {
     return conversationStorage.save(conversation);
   },
 
+  // Link a local conversation to its backend conversation
+  setServerId: (conversationId: string, serverId: number): Conversation | null => {
+    const conversation = conversationStorage.getById(conversationId);
+    if (!conversation) return null;
+    conversation.serverId = serverId;
+    return conversationStorage.save(conversation);
+  },
+
+  // Unlink a local conversation from its backend conversation
+  clearServerId: (conversationId: string): Conversation | null => {
+    const conversation = conversationStorage.getById(conversationId);
+    if (!conversation) return null;
+    delete conversation.serverId;
+    return conversationStorage.save(conversation);
+  },
+
   // Delete a conversation
   delete: (id: string): boolean => {
     try {
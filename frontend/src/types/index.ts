@@ -7,6 +7,8 @@ export interface Agent {
   system_prompt: string;
   model: string;
   temperature: string;
+  keep_alive?: string | null;
+  num_ctx?: number | null;
   is_active: boolean;
   created_at: string;
   updated_at: string | null;
@@ -33,6 +35,7 @@ export interface ChatMessage {
 
 export interface Conversation {
   id: string;
+  serverId?: number; // Backend conversation ID; history is then kept server-side
   agentId: number;
   agentName: string;
   messages: ChatMessage[];
@@ -44,11 +47,23 @@ export interface ChatRequest {
   agent_id: number;
   messages: ChatMessage[];
   stream?: boolean;
+  conversation_id?: number;
 }
 
 export interface ChatResponse {
   response: string;
   agent_id: number;
+  conversation_id?: number | null;
+  request_id?: string | null;
+  cancelled?: boolean;
+}
+
+export interface ServerConversation {
+  id: number;
+  agent_id: number;
+  title: string | null;
+  created_at: string;
+  updated_at: string | null;
 }
 
 export type TabId = 'chat' | 'agent' | 'tool';